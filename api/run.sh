@@ -0,0 +1,2 @@
+echo "--------Starting the API---------"
+python3 server.py "$@"
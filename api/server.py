@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.web
+from tornado.ioloop import IOLoop
+
+from utils import CATEGORIES, create_dataset_store, to_records
+from common.poi_index import find_nearby_pois
+
+STREET_FIELDS = ["typo", "historique", "orig", "historique_en", "orig_en", "arrdt", "quartier", "Ylat", "Xlong"]
+DEFAULT_RADIUS = 1
+DEFAULT_LIMIT = 50
+MAX_RADIUS = 10
+MAX_LIMIT = 1000
+
+
+def street_record(street):
+    data = street.data[[column for column in STREET_FIELDS if column in street.data.columns]]
+    return to_records(data.head(1))[0]
+
+
+def find_street(snapshot, name):
+    """Returns (street, suggestions) for a street name."""
+    street = snapshot.street_lookup.resolve(name)
+    if street is not None:
+        return street, []
+    return None, snapshot.street_index.suggest(name.strip().upper(), k=3, cutoff=0.6)
+
+
+def nearby(snapshot, street, categories, radius, limit):
+    """{category: POIs within `radius` km of the street, nearest first, at most `limit`} for `categories`."""
+    found = find_nearby_pois(snapshot.poi_index, snapshot.proximity_table, street.typo, street.coords, categories, radius, limit)
+    result = {}
+    for category in categories:
+        poi_ids, distances, _ = found[category]
+        records = snapshot.records[category]
+        result[category] = [
+            {**records[poi_id], "distance": float(distance)}
+            for poi_id, distance in zip(poi_ids.tolist(), distances.tolist())
+        ]
+    return result
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    """Runs the CPU-bound part of a request on the worker pool, within the concurrency limit."""
+
+    def initialize(self, store, executor, limiter):
+        self.store = store
+        self.executor = executor
+        self.limiter = limiter
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+
+    def write_json(self, payload, status=200):
+        self.set_status(status)
+        self.finish(json.dumps(payload, ensure_ascii=False, default=str))
+
+    def write_error(self, status_code, **kwargs):
+        self.finish(json.dumps({"error": self._reason}))
+
+    def get_float(self, name, default, maximum):
+        try:
+            value = float(self.get_query_argument(name, default))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason=f"'{name}' must be a number")
+        if not 0 < value <= maximum:
+            raise tornado.web.HTTPError(400, reason=f"'{name}' must be in ]0, {maximum}]")
+        return value
+
+    def get_int(self, name, default, maximum):
+        try:
+            value = int(self.get_query_argument(name, default))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason=f"'{name}' must be an integer")
+        if not 1 <= value <= maximum:
+            raise tornado.web.HTTPError(400, reason=f"'{name}' must be in [1, {maximum}]")
+        return value
+
+    async def run(self, function, *args):
+        # Pas de file d'attente illimitée : au-delà de la limite, le client réessaiera
+        if self.limiter.locked():
+            raise tornado.web.HTTPError(503, reason="Too many concurrent requests")
+        async with self.limiter:
+            return await IOLoop.current().run_in_executor(self.executor, function, self.store.get(), *args)
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.write_json({"status": "ok", "version": self.store.version})
+
+
+class SuggestionsHandler(BaseHandler):
+    async def get(self):
+        query = self.get_query_argument("q", "").strip()
+        if not query:
+            raise tornado.web.HTTPError(400, reason="Missing 'q' parameter")
+        k = self.get_int("k", 3, 20)
+        suggestions = await self.run(lambda snapshot: snapshot.street_index.suggest(query.upper(), k=k, cutoff=0.6))
+        self.write_json({"query": query, "suggestions": suggestions})
+
+
+class StreetHandler(BaseHandler):
+    async def get(self, name):
+        def search(snapshot):
+            street, suggestions = find_street(snapshot, name)
+            return (street_record(street) if street is not None else None), suggestions
+
+        record, suggestions = await self.run(search)
+        if record is None:
+            self.write_json({"error": "Street not found", "query": name, "suggestions": suggestions}, status=404)
+            return
+        self.write_json({"street": record})
+
+
+class NearbyHandler(BaseHandler):
+    async def get(self, name, category=None):
+        categories = [category] if category else CATEGORIES
+        if category not in (None, *CATEGORIES):
+            raise tornado.web.HTTPError(404, reason=f"Unknown category '{category}'")
+        radius = self.get_float("radius", DEFAULT_RADIUS, MAX_RADIUS)
+        limit = self.get_int("limit", DEFAULT_LIMIT, MAX_LIMIT)
+
+        def search(snapshot):
+            street, suggestions = find_street(snapshot, name)
+            if street is None:
+                return None, suggestions
+            return {
+                "street": street.typo,
+                "radius": radius,
+                **nearby(snapshot, street, categories, radius, limit),
+            }, suggestions
+
+        result, suggestions = await self.run(search)
+        if result is None:
+            self.write_json({"error": "Street not found", "query": name, "suggestions": suggestions}, status=404)
+            return
+        self.write_json(result)
+
+
+def make_app(store, workers=4, max_concurrency=64):
+    """The datasets, worker pool and concurrency limit are shared by every handler."""
+    settings = {
+        "store": store,
+        "executor": ThreadPoolExecutor(max_workers=workers),
+        "limiter": asyncio.Semaphore(max_concurrency),
+    }
+    return tornado.web.Application([
+        (r"/health", HealthHandler, settings),
+        (r"/suggestions", SuggestionsHandler, settings),
+        (r"/streets/([^/]+)", StreetHandler, settings),
+        (r"/streets/([^/]+)/nearby", NearbyHandler, settings),
+        (r"/streets/([^/]+)/nearby/([^/]+)", NearbyHandler, settings),
+    ])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="HTTP JSON API for street lookups and nearby places.")
+    parser.add_argument("--port", type=int, default=5003)
+    parser.add_argument("--workers", type=int, default=4, help="Threads answering the queries.")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Requests in progress before answering 503.")
+    args = parser.parse_args()
+    store = create_dataset_store()
+    app = make_app(store, args.workers, args.max_concurrency)
+    app.listen(args.port)
+    print(f"API listening on port {args.port} (data version {store.version})")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
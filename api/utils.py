@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from common.compact import COORDINATE_COLUMNS, compact_frame
+from common.dataset_store import DatasetStore
+from common.poi_index import load_poi_index
+from common.proximity import load_proximity_table
+from common.staged_io import read_staged
+from common.street_index import StreetLookup, TrigramIndex
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+# Colonnes renvoyées par l'API, les seules chargées
+DATA_COLUMNS = {
+    "street": ["typo", "typo_normalized", "historique", "orig", "historique_en", "orig_en", "arrdt", "quartier", "Ylat", "Xlong"],
+    "parking": ["nom", "adresse", "nb_places", "tarif_1h", "tarif_2h", "tarif_3h", "tarif_4h", "tarif_24h", "gratuit", "hauteur_max", "Ylat", "Xlong"],
+    "museum": ["name", "adresse", "Ylat", "Xlong"],
+    "toilets": ["ADRESSE", "ACCES_PMR", "HORAIRE", "Ylat", "Xlong"],
+    "sports": ["name", "adresse", "Ylat", "Xlong"],
+}
+CATEGORIES = ["parking", "museum", "toilets", "sports"]
+
+
+def get_staged_data_path(data_name):
+    return DATA_DIR / f"{data_name}_data_staged.csv"
+
+
+def get_artifact_path(file_name):
+    return DATA_DIR / file_name
+
+
+def to_records(data):
+    """Converts rows to JSON-friendly dicts (missing values become null)."""
+    # Coordonnées en float32 : arrondies au dixième de mètre pour ne pas afficher le bruit de conversion
+    data = data.assign(**{column: data[column].astype(float).round(6) for column in COORDINATE_COLUMNS if column in data.columns})
+    data = data.astype(object).where(data.notna(), None)
+    return data.to_dict("records")
+
+
+def load_datasets():
+    """Loads the staged datasets and builds the indexes shared by every request."""
+    # Arrow copies mapped read-only (shared with the other processes), or compacted tables
+    datasets = {name: compact_frame(read_staged(get_staged_data_path(name), columns, mapped=True)) for name, columns in DATA_COLUMNS.items()}
+    street_index_path = get_artifact_path("street_index.json")
+    pois = {category: datasets[category] for category in CATEGORIES}
+    return datasets, {
+        "street_lookup": StreetLookup(datasets["street"]),
+        "street_index": TrigramIndex.load(street_index_path) if street_index_path.exists() else TrigramIndex.from_street_data(datasets["street"]),
+        "poi_index": load_poi_index(get_staged_data_path("poi"), pois),
+        "proximity_table": load_proximity_table(get_staged_data_path("proximity"), pois),
+        # Lignes déjà converties en JSON, une réponse ne fait que les sélectionner
+        "records": {category: to_records(datasets[category]) for category in CATEGORIES},
+    }
+
+
+def create_dataset_store():
+    """Store reloading the datasets once the integrator has rewritten them (its manifest is written last)."""
+    return DatasetStore(get_artifact_path("integration_manifest.json"), load_datasets)
@@ -0,0 +1,108 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+from synthetic import generate
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+WORKSPACES_DIR = BENCHMARKS_DIR / "workspace"
+BASELINE_PATH = BENCHMARKS_DIR / "baseline.json"
+COMPONENTS = ["webapp", "processor", "integrator"]
+# Métriques comparées à la référence : plus elles sont élevées, moins c'est bon
+COMPARED_METRICS = ["median_ms", "peak_mib"]
+
+
+def get_workspace(scale, regenerate=False):
+    """Synthetic workspace of a scale, generated on first use."""
+    workspace = WORKSPACES_DIR / f"x{scale:g}"
+    if regenerate or not (workspace / "synthetic.json").exists():
+        print(f"Generating synthetic data x{scale:g}...")
+        generate(workspace, scale)
+    return workspace
+
+
+def run_component(component, workspace, queries, repeat):
+    """Runs the benchmarks of a component in a fresh process. Returns {hot path: metrics}."""
+    process = subprocess.run(
+        [sys.executable, str(BENCHMARKS_DIR / "worker.py"), component,
+         "--workspace", str(workspace), "--queries", str(queries), "--repeat", str(repeat)],
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        return {"failed": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "unknown error"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Returns the (benchmark, metric, baseline, current) over the tolerated slowdown."""
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if not isinstance(metrics, dict) or not isinstance(reference, dict):
+            continue
+        for metric in COMPARED_METRICS:
+            if metric in metrics and reference.get(metric) and metrics[metric] > reference[metric] * (1 + tolerance):
+                regressions.append((name, metric, reference[metric], metrics[metric]))
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"\n{'benchmark':<60} {'median ms':>10} {'p95 ms':>10} {'ops/s':>10} {'peak MiB':>9} {'vs base':>8}")
+    for name, metrics in results.items():
+        if "median_ms" not in metrics:
+            print(f"{name:<60} {next(iter(metrics.values()))}")
+            continue
+        reference = baseline.get(name, {}).get("median_ms")
+        ratio = f"{metrics['median_ms'] / reference:.2f}x" if reference else "-"
+        print(
+            f"{name:<60} {metrics['median_ms']:>10.2f} {metrics['p95_ms']:>10.2f} "
+            f"{metrics['ops_per_s']:>10.1f} {metrics['peak_mib']:>9.2f} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic Paris data.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1], help="Data sizes relative to Paris, e.g. 1 10 100.")
+    parser.add_argument("--components", nargs="+", choices=COMPONENTS, default=COMPONENTS)
+    parser.add_argument("--queries", type=int, default=100, help="Number of searches per hot path.")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate the synthetic data.")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a regression is reported.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text())["results"] if baseline_path.exists() else {}
+    results = {}
+    for scale in args.scales:
+        workspace = get_workspace(scale, args.regenerate)
+        for component in args.components:
+            print(f"Running {component} benchmarks x{scale:g}...")
+            for name, metrics in run_component(component, workspace, args.queries, args.repeat).items():
+                results[f"x{scale:g}/{component}/{name}"] = metrics if isinstance(metrics, dict) else {"status": metrics}
+
+    print_results(results, baseline)
+    report = {"machine": platform.platform(), "python": platform.python_version(), "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {baseline_path}")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:")
+        for name, metric, reference, current in regressions:
+            print(f"  {name} {metric}: {reference:.2f} -> {current:.2f}")
+        sys.exit(1)
+    if baseline:
+        print("\nNo regression against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
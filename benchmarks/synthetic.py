@@ -0,0 +1,196 @@
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(REPO_ROOT))
+from common.translation import TranslationCache
+
+# Tailles des jeux de données de Paris (échelle 1)
+PARIS_SIZES = {"street": 6_500, "parking": 40_000, "toilets": 600, "museum": 400, "sports": 2_500}
+# Emprise de Paris
+LAT_RANGE = (48.816, 48.902)
+LON_RANGE = (2.225, 2.470)
+
+STREET_TYPES = ["RUE", "AVENUE", "BOULEVARD", "PLACE", "IMPASSE", "QUAI", "VILLA", "PASSAGE", "ALLEE", "SQUARE"]
+LINKS = ["DE", "DU", "DES", "DE LA", "SAINT"]
+WORDS = [
+    "RIVOLI", "BAC", "ECOLES", "HONORE", "LEPIC", "MONTMARTRE", "VAUGIRARD", "GRENELLE", "SEVRES", "CHARONNE",
+    "BELLEVILLE", "OBERKAMPF", "TEMPLE", "TURENNE", "BRETAGNE", "ABBESSES", "CLICHY", "ITALIE", "PASSY", "AUTEUIL",
+    "BERCY", "REUILLY", "PICPUS", "CONVENTION", "ALESIA", "DENFERT", "GOBELINS", "MONGE", "MOUFFETARD", "ODEON",
+]
+HISTORIQUE = ["Précédemment, partie de la rue voisine.", "Ancien chemin de la commune.", "Voie ouverte en 1850.", None]
+ORIG = ["Nom d'un ancien propriétaire.", "Voisinage d'une église.", "Nom d'une ville de France.", None]
+PARKING_COLUMNS = [
+    "id", "id_local", "nom", "insee", "adresse", "url", "type_usagers", "gratuit", "nb_places", "nb_pr", "nb_pmr",
+    "nb_voitures_electriques", "nb_velo", "nb_2r_el", "nb_autopartage", "nb_2_rm", "nb_covoit", "hauteur_max",
+    "num_siret", "Xlong", "Ylat", "tarif_pmr", "tarif_1h", "tarif_2h", "tarif_3h", "tarif_4h", "tarif_24h",
+    "abo_resident", "abo_non_resident", "type_ouvrage", "info",
+]
+# Part des parkings de la base nationale situés à Paris
+PARIS_PARKING_SHARE = 0.3
+
+
+def street_names(rng, count):
+    names = [
+        f"{rng.choice(STREET_TYPES)} {rng.choice(LINKS)} {rng.choice(WORDS)}" + (f" {rng.choice(WORDS)}" if i % 3 else "")
+        for i in range(count)
+    ]
+    # Les noms de rue sont uniques
+    seen = {}
+    for i, name in enumerate(names):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            names[i] = f"{name} {seen[name]}"
+    return names
+
+
+def near(rng, lat, lon, spread_km=0.3):
+    """Points scattered around (lat, lon), so POIs sit along the streets like in the real data."""
+    lat = lat + rng.normal(0, spread_km / 111, len(lat))
+    lon = lon + rng.normal(0, spread_km / 73, len(lon))
+    return lat, lon
+
+
+def feature_collection(lat, lon, properties):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [float(x), float(y)]}, "properties": props}
+            for x, y, props in zip(lon, lat, properties)
+        ],
+    }
+
+
+def generate_raw(data_dir, scale=1, seed=0):
+    """Writes the five raw files, in the formats of the downloaded ones, sized `scale` times Paris."""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    sizes = {name: max(1, int(size * scale)) for name, size in PARIS_SIZES.items()}
+
+    n = sizes["street"]
+    names = street_names(rng, n)
+    street_lat = rng.uniform(*LAT_RANGE, n)
+    street_lon = rng.uniform(*LON_RANGE, n)
+    pd.DataFrame({
+        "typo": names,
+        "orig": rng.choice(ORIG, n),
+        "historique": rng.choice(HISTORIQUE, n),
+        "typvoie": [name.split(" ")[0] for name in names],
+        "arrdt": [f"{a}e" for a in rng.integers(1, 21, n)],
+        "quartier": [f"Quartier {q}" for q in rng.integers(1, 81, n)],
+        "longueur": rng.integers(20, 2000, n),
+        "largeur": rng.integers(5, 40, n),
+        "geo_point_2d": [f"{a}, {b}" for a, b in zip(street_lat, street_lon)],
+        "geo_shape": "{}",
+    }).to_csv(data_dir / "street_data_raw.csv", index=False, encoding="utf-8-sig")
+
+    def addresses(count, case=str.title):
+        streets = rng.integers(0, n, count)
+        lat, lon = near(rng, street_lat[streets], street_lon[streets])
+        return [f"{rng.integers(1, 120)} {case(names[s])}" for s in streets], lat, lon
+
+    m = sizes["parking"]
+    adresse, lat, lon = addresses(m)
+    paris = rng.random(m) < PARIS_PARKING_SHARE
+    parking = {column: "" for column in PARKING_COLUMNS}
+    parking.update(
+        id=[f"bnls-{i}" for i in range(m)], nom=[f"Parking {i}" for i in range(m)],
+        insee=np.where(paris, rng.integers(75101, 75121, m), rng.choice([69123, 13055, 33063, 31555], m)),
+        adresse=adresse, gratuit=rng.choice([0, 1], m, p=[0.8, 0.2]), nb_places=rng.integers(10, 800, m),
+        nb_pmr=rng.integers(0, 20, m), hauteur_max=rng.choice(["190", "200", "210", ""], m), Xlong=lon, Ylat=lat,
+        tarif_1h=rng.choice([2.5, 3.0, 4.2, np.nan], m), tarif_2h=rng.choice([5.0, 6.5, np.nan], m),
+        tarif_3h=rng.choice([7.0, 9.5, np.nan], m), tarif_4h=rng.choice([9.0, 12.0, np.nan], m),
+        tarif_24h=rng.choice([30.0, 38.0, np.nan], m), type_ouvrage=rng.choice(["ouvrage", "enclos_en_surface"], m),
+        info="",
+    )
+    pd.DataFrame(parking)[PARKING_COLUMNS].to_csv(data_dir / "parking_data_raw.csv", sep=";", index=False)
+
+    t = sizes["toilets"]
+    adresse, lat, lon = addresses(t, str.lower)
+    pd.DataFrame({
+        "TYPE": "SANISETTE", "STATUT": "Ouvert", "ADRESSE": adresse, "ARRONDISSEMENT": rng.integers(75001, 75021, t),
+        "HORAIRE": rng.choice(["24 h / 24", "6 h - 22 h"], t), "ACCES_PMR": rng.choice(["Oui", "Non"], t),
+        "RELAIS_BEBE": rng.choice(["Oui", "Non"], t), "URL_FICHE_EQUIPEMENT": "",
+        "geo_point_2d": [f"{a}, {b}" for a, b in zip(lat, lon)],
+    }).to_csv(data_dir / "toilets_data_raw.csv", sep=";", index=False)
+
+    k = sizes["museum"]
+    adresse, lat, lon = addresses(k)
+    museums = [
+        {"l_ep_min": f"Musée {i}", "adresse": adresse[i], "c_postal": int(rng.integers(75001, 75021))}
+        if i % 7 else {"l_ep_min": f"Lieu {i}"}
+        for i in range(k)
+    ]
+    with open(data_dir / "museum_data_raw.json", "w") as file:
+        json.dump(feature_collection(lat, lon, museums), file)
+
+    k = sizes["sports"]
+    streets = rng.integers(0, n, k)
+    lat, lon = near(rng, street_lat[streets], street_lon[streets])
+    sports = []
+    for i, s in enumerate(streets):
+        parts = names[s].split(" ")
+        sports.append({
+            "l_ep_maj": f"GYMNASE {i}", "n_voie": str(rng.integers(1, 120)), "c_suf1": None, "c_suf2": None,
+            "c_suf3": None, "c_desi": parts[0], "c_liaison": parts[1], "l_voie": " ".join(parts[2:]),
+            "d_annee_cr": int(rng.integers(1900, 2020)) if i % 5 else None, "b_public": int(rng.integers(0, 2)),
+            "c_postal": int(rng.integers(75001, 75021)),
+        })
+    with open(data_dir / "sports_data_raw.json", "w") as file:
+        json.dump(feature_collection(lat, lon, sports), file)
+    return sizes
+
+
+def seed_translation_cache(data_dir):
+    """Fills the translation cache for every synthetic text, so no benchmark calls the translation service."""
+    cache = TranslationCache(Path(data_dir) / "translation_cache.sqlite")
+    # "not specified" est la valeur des textes manquants après intégration
+    for text in [*HISTORIQUE, *ORIG, "not specified"]:
+        if text is not None:
+            cache.set(text, "en", f"[en] {text}")
+
+
+def integrate(workspace):
+    """Builds the staged files with the project's integrator, run as in production."""
+    workdir = Path(workspace) / "data_integrator" / "integrator"
+    workdir.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [sys.executable, str(REPO_ROOT / "data_integrator" / "integrator" / "integrator.py"), "--force"],
+        cwd=workdir, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def generate(workspace, scale=1, seed=0):
+    """
+    Creates a workspace mirroring the repository layout (`data/`, `data_processor/`, ...)
+    with raw and staged files, so every component finds its data at its usual relative path.
+    """
+    workspace = Path(workspace)
+    for directory in ["data", "data_processor", "data_integrator/integrator"]:
+        (workspace / directory).mkdir(parents=True, exist_ok=True)
+    sizes = generate_raw(workspace / "data", scale, seed)
+    seed_translation_cache(workspace / "data")
+    integrate(workspace)
+    (workspace / "synthetic.json").write_text(json.dumps({"scale": scale, "seed": seed, "sizes": sizes}))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Paris datasets (raw and staged).")
+    parser.add_argument("--scale", type=float, default=1, help="Size relative to Paris (1, 10, 100...).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="Workspace directory to create.")
+    args = parser.parse_args()
+    sizes = generate(args.output, args.scale, args.seed)
+    print(f"Synthetic data x{args.scale:g} written to {args.output}: {sizes}")
+
+
+if __name__ == "__main__":
+    main()
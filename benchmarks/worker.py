@@ -0,0 +1,144 @@
+"""
+Runs the benchmarks of one component inside its own process, from the component's
+directory of a synthetic workspace, as the component itself would run.
+Every component has its own `utils` module, hence one process per component.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Répertoire de travail et code de chaque composant
+COMPONENTS = {
+    "webapp": (".", REPO_ROOT / "webapp"),
+    "processor": ("data_processor", REPO_ROOT / "data_processor"),
+    "integrator": ("data_integrator/integrator", REPO_ROOT / "data_integrator" / "integrator"),
+}
+
+
+def measure(function, calls, repeat=1):
+    """
+    Times `function(*args)` for every args tuple of `calls`, `repeat` times.
+    Peak memory is measured apart, on the first call, as tracemalloc slows everything down.
+    """
+    function(*calls[0])
+    latencies = []
+    for _ in range(repeat):
+        for args in calls:
+            start = time.perf_counter()
+            function(*args)
+            latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(*calls[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "calls": len(latencies),
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "ops_per_s": len(latencies) / sum(latencies),
+        "peak_mib": peak / 2**20,
+    }
+
+
+def street_queries(street_data, count, seed=0):
+    """Street names as users type them: mostly exact, some in lowercase, some misspelled."""
+    rng = np.random.default_rng(seed)
+    names = street_data["typo"].sample(count, replace=True, random_state=seed).tolist()
+    queries = []
+    for name in names:
+        kind = rng.random()
+        if kind < 0.1:
+            queries.append(name.lower())
+        elif kind < 0.2:
+            position = int(rng.integers(0, len(name)))
+            queries.append(name[:position] + name[position + 1:])
+        else:
+            queries.append(name)
+    return queries
+
+
+def bench_webapp(queries, repeat):
+    import utils
+
+    snapshot = utils.get_snapshot()
+    names = street_queries(snapshot.datasets["streets"], queries)
+    streets = [street for street, _ in map(utils.get_street_data, names) if street is not None and street.coords is not None]
+    results = {"get_street_data": measure(utils.get_street_data, [(name,) for name in names], repeat)}
+    results["poi_index.within_radius"] = measure(
+        snapshot.poi_index.within_radius, [(street.coords, 1) for street in streets], repeat
+    )
+    results["compute_nearby_pois"] = measure(
+        lambda street: utils.compute_nearby_pois(snapshot, street, 1), [(street,) for street in streets], repeat
+    )
+    street = streets[0]
+    parking = utils.get_nearby_data(street, "parking", 1)
+    results["display_map[parking]"] = measure(
+        utils.display_map, [(parking, "Ylat", "Xlong", utils.parking_popup, "parking", street.coords)], repeat
+    )
+    # Carte déjà rendue par une autre session
+    results["display_map[parking, cached]"] = measure(
+        lambda: utils.display_map(parking, "Ylat", "Xlong", utils.parking_popup, "parking", street.coords, cache_key=(street.typo, "parking", 1)),
+        [()], repeat,
+    )
+    return results
+
+
+def bench_processor(queries, repeat):
+    import processor
+    from common.address_matcher import AddressMatcher
+
+    results = {"load_data": measure(processor.load_data, [()], repeat)}
+    street_data, parking_data, museum_data, toilets_data, sports_data = processor.load_data()
+    lookup = processor.StreetLookup(street_data)
+    streets = [lookup.resolve(name) for name in street_data["typo"].sample(queries, replace=True, random_state=0)]
+    matchers = [(AddressMatcher(street.data["typo_normalized"].tolist()),) for street in streets]
+    results["process_street_data"] = measure(
+        lambda street: processor.process_street_data(street.data.copy()), [(street,) for street in streets], repeat
+    )
+    datasets = {"parking": parking_data, "museum": museum_data, "toilets": toilets_data, "sports": sports_data}
+    poi_data = processor.load_poi_data(datasets)
+    results["match_poi_data"] = measure(lambda matcher: processor.match_poi_data(poi_data, datasets, matcher), matchers, repeat)
+    return results
+
+
+def bench_integrator(queries, repeat):
+    import integrator
+
+    results = {}
+    # Chaque étape réécrit ses sorties à l'identique, on la relance telle quelle
+    for name in [*integrator.DATASET_STAGES, *integrator.DERIVED_STAGES]:
+        stage = integrator.DATASET_STAGES.get(name) or integrator.DERIVED_STAGES[name][0]
+        results[f"stage[{name}]"] = measure(stage, [()], repeat)
+    return results
+
+
+BENCHMARKS = {"webapp": bench_webapp, "processor": bench_processor, "integrator": bench_integrator}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark one component on a synthetic workspace.")
+    parser.add_argument("component", choices=BENCHMARKS)
+    parser.add_argument("--workspace", required=True)
+    parser.add_argument("--queries", type=int, default=100, help="Number of distinct searches per hot path.")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    workdir, code_dir = COMPONENTS[args.component]
+    os.chdir(Path(args.workspace) / workdir)
+    sys.path.insert(0, str(code_dir))
+    try:
+        results = BENCHMARKS[args.component](args.queries, args.repeat)
+    except ImportError as e:
+        results = {"skipped": str(e)}
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
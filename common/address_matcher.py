@@ -0,0 +1,80 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class AddressMatcher:
+    """
+    Aho-Corasick automaton over normalized street names (e.g. `typo_normalized`).
+    Each address is scanned once whatever the number of patterns, and every
+    distinct address is only scanned once per column.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._outputs[node].append(pattern_id)
+        # Liens d'échec en largeur : chaque nœud hérite des motifs de son suffixe le plus long
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+                queue.append(child)
+        self._first = [min(outputs) if outputs else len(self.patterns) for outputs in self._outputs]
+
+    def _walk(self, text):
+        node = 0
+        yield node
+        goto, fail = self._goto, self._fail
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            yield node
+
+    def first_match(self, text):
+        """Returns the first pattern, in the given order, contained in `text`, or None."""
+        first = self._first
+        best = min((first[node] for node in self._walk(text)), default=len(self.patterns))
+        return self.patterns[best] if best < len(self.patterns) else None
+
+    def find_all(self, text):
+        """Returns the set of pattern ids contained in `text`."""
+        outputs = self._outputs
+        return {pattern_id for node in self._walk(text) for pattern_id in outputs[node]}
+
+    def match(self, addresses):
+        """Returns, for each address of the Series, its first matching pattern or None."""
+        addresses = addresses.astype(str)
+        matches = {address: self.first_match(address) for address in addresses.unique()}
+        return addresses.map(matches)
+
+    def positions_by_pattern(self, addresses):
+        """Returns {pattern: positions of the addresses containing it}, for many target streets at once."""
+        addresses = addresses.astype(str)
+        codes, uniques = pd.factorize(addresses)
+        found = {pattern_id: [] for pattern_id in range(len(self.patterns))}
+        for code, address in enumerate(uniques):
+            for pattern_id in self.find_all(address):
+                found[pattern_id].append(code)
+        return {
+            self.patterns[pattern_id]: np.flatnonzero(np.isin(codes, matched_codes))
+            for pattern_id, matched_codes in found.items()
+        }
@@ -0,0 +1,100 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+COORDINATE_COLUMNS = ("Ylat", "Xlong")
+# Colonnes de recherche (clés exactes) : gardées en chaînes
+KEY_COLUMNS = ("typo", "typo_normalized", "adresse_normalized")
+
+
+def intern_strings(values):
+    """Returns the column with one shared Python object per distinct string."""
+    codes, uniques = pd.factorize(values)
+    interned = np.array([sys.intern(value) if isinstance(value, str) else value for value in uniques], dtype=object)
+    result = np.full(len(values), np.nan, dtype=object)
+    found = codes >= 0
+    result[found] = interned[codes[found]]
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def compact_frame(data, max_category_ratio=0.5, key_columns=KEY_COLUMNS):
+    """
+    Returns a smaller copy of a staged table, for long-lived readers:
+    float32 coordinates (about 1 m precision), categorical text columns when they
+    have few distinct values, and interned strings for the other text columns.
+    Columns mapped from an Arrow file are already shared between processes and kept as they are.
+    """
+    data = data.copy()
+    for column in data.columns:
+        values = data[column]
+        if is_mapped(values):
+            continue
+        if column in COORDINATE_COLUMNS:
+            data[column] = pd.to_numeric(values, errors="coerce").astype("float32")
+        elif values.dtype == object:
+            if column not in key_columns and values.nunique() <= max_category_ratio * len(values):
+                data[column] = values.astype("category")
+            else:
+                data[column] = intern_strings(values)
+    return data
+
+
+def is_mapped(values):
+    """True for a column backed by Arrow memory, i.e. mapped from a staged Arrow file."""
+    return isinstance(values.dtype, pd.ArrowDtype)
+
+
+def shared_memory(data):
+    """Bytes of the columns mapped from Arrow files, shared by every process mapping them."""
+    return sum(data[column].memory_usage(index=False) for column in data.columns if is_mapped(data[column]))
+
+
+def frame_memory(data):
+    """Bytes held by a table in this process, counting every Python object once (interned strings are shared)."""
+    total = data.index.memory_usage(deep=True)
+    seen = set()
+    for column in data.columns:
+        values = data[column]
+        if is_mapped(values):
+            continue
+        if values.dtype != object:
+            total += values.memory_usage(index=False, deep=True)
+            continue
+        array = values.to_numpy()
+        total += array.nbytes
+        for value in array:
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def memory_report(datasets):
+    """Rows, columns, private memory and mapped memory (MiB) of each table of `datasets`, with a total."""
+    report = pd.DataFrame(
+        [
+            (name, len(data), len(data.columns), frame_memory(data) / 2**20, shared_memory(data) / 2**20)
+            for name, data in datasets.items()
+        ],
+        columns=["dataset", "rows", "columns", "MiB", "shared MiB"],
+    ).set_index("dataset")
+    total = pd.DataFrame([report.sum()], index=pd.Index(["total"], name="dataset")).astype(report.dtypes)
+    return pd.concat([report, total])
+
+
+if __name__ == "__main__":
+    # Mémoire des données intermédiaires, complètes puis compactées : python -m common.compact data
+    from pathlib import Path
+    from common.staged_io import STAGED_TABLES, read_staged, staged_exists
+
+    data_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "data")
+    # Tables nommées une à une : certaines (proximité) n'ont pas de CSV
+    paths = {name: data_dir / f"{name}_data_staged.csv" for name in STAGED_TABLES}
+    paths = {name: path for name, path in paths.items() if staged_exists(path)}
+    datasets = {name: read_staged(path) for name, path in paths.items()}
+    full = memory_report(datasets)[["rows", "columns", "MiB"]]
+    compact = memory_report({name: compact_frame(data) for name, data in datasets.items()})
+    mapped = memory_report({name: read_staged(path, mapped=True) for name, path in paths.items()})
+    report = full.join(compact["MiB"], rsuffix=" compact").join(mapped[["MiB", "shared MiB"]], rsuffix=" mapped")
+    print(report.round(2).to_string())
@@ -0,0 +1,85 @@
+import threading
+import time
+from pathlib import Path
+
+
+class DatasetSnapshot:
+    """
+    Immutable set of datasets and derived indexes built from one version of the staged files.
+    `dataset(name)` hands out shallow copies: with pandas copy-on-write, which the
+    app enables at startup, a caller mutating its copy never changes the shared frame.
+    """
+
+    def __init__(self, version, datasets, **derived):
+        self.version = version
+        self.datasets = datasets
+        for name, value in derived.items():
+            setattr(self, name, value)
+
+    def dataset(self, name):
+        return self.datasets[name].copy(deep=False)
+
+
+class DatasetStore:
+    """
+    Loads staged data once per process and hands the same snapshot to every caller.
+    The integrator rewrites `marker` (its manifest) after every other file: when it
+    changes, a new snapshot is built in a background thread and swapped in atomically;
+    callers keep the previous one meanwhile.
+    """
+
+    def __init__(self, marker, loader, check_interval=5):
+        self.marker = Path(marker)
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._last_check = time.monotonic()
+        self._signature = self._marker_signature()
+        self._snapshot = self._build(1)
+
+    def _marker_signature(self):
+        try:
+            stat = self.marker.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _build(self, version):
+        datasets, derived = self.loader()
+        return DatasetSnapshot(version, datasets, **derived)
+
+    def _reload(self, signature):
+        snapshot = None
+        try:
+            snapshot = self._build(self._snapshot.version + 1)
+        except Exception as e:
+            print(f"Reload of staged data failed, keeping version {self._snapshot.version}: {e}")
+        finally:
+            with self._lock:
+                # La signature n'est retenue qu'après un chargement réussi : un échec sera retenté
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                    self._signature = signature
+                self._reloading = False
+
+    def check_for_changes(self):
+        """Starts a background reload if the integrator finished a new run. Returns True if one was started."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            signature = self._marker_signature()
+            if self._reloading or signature == self._signature:
+                return False
+            self._reloading = True
+        threading.Thread(target=self._reload, args=(signature,), daemon=True).start()
+        return True
+
+    def get(self):
+        """Returns the current snapshot, checking the marker at most every `check_interval` seconds."""
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.check_for_changes()
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
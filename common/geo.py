@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Vectorized great circle distance in kilometers.
+    All coordinates are expected in radians and can be scalars or broadcastable arrays.
+    """
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class RadiusQueryEngine:
+    """
+    Answers radius queries over a POI table.
+    Coordinates are coerced and converted to radians once, at construction time,
+    so every query is a single NumPy pass over the whole table.
+    """
+
+    def __init__(self, data, lat_col="Ylat", long_col="Xlong", coordinates=None):
+        # `coordinates` : (latitudes, longitudes) des lignes en radians quand elles sont déjà calculées (fichier .npy projeté)
+        if coordinates is None:
+            coordinates = (
+                np.radians(pd.to_numeric(data[lat_col], errors="coerce").to_numpy(dtype=float)),
+                np.radians(pd.to_numeric(data[long_col], errors="coerce").to_numpy(dtype=float)),
+            )
+        lat, lon = coordinates
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        # Sans coordonnée manquante, on garde la table et les tableaux tels quels (aucune copie)
+        all_valid = bool(valid.all())
+        self.data = data.reset_index(drop=True) if all_valid else data[valid].reset_index(drop=True)
+        self.lat_rad = lat if all_valid else lat[valid]
+        self.lon_rad = lon if all_valid else lon[valid]
+
+    def __len__(self):
+        return len(self.data)
+
+    def distances(self, point):
+        """Returns the distance in km from (lat, lon) to every POI."""
+        lat, lon = np.radians(point[0]), np.radians(point[1])
+        return haversine_km(lat, lon, self.lat_rad, self.lon_rad)
+
+    def _select(self, positions, distances):
+        order = np.argsort(distances, kind="stable")
+        result = self.data.iloc[positions[order]].copy()
+        result["distance"] = distances[order]
+        return result
+
+    def query(self, point, radius=1):
+        """Returns the POIs within `radius` km of (lat, lon), nearest first, with a float `distance` column."""
+        distances = self.distances(point)
+        positions = np.flatnonzero(distances <= radius)
+        return self._select(positions, distances[positions])
@@ -0,0 +1,156 @@
+"""
+Opt-in timers, counters and sampling profiler.
+
+- AROUNDME_METRICS=<file> (or "-" for stderr) logs one JSON line per timed section,
+  plus a summary of every timer and counter when the process exits.
+- AROUNDME_PROFILE=<file> samples the stacks of every thread every
+  AROUNDME_PROFILE_INTERVAL seconds (0.01 by default) and writes them at exit in the
+  collapsed format ("frame;frame;frame count") read by flame graph tools. A "{pid}"
+  in the file name is replaced by the process id.
+
+When neither is set, `timed` returns a shared no-op context manager, `timed_function`
+returns the function unchanged and `count` returns immediately.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import wraps
+
+METRICS_PATH = os.environ.get("AROUNDME_METRICS")
+PROFILE_PATH = os.environ.get("AROUNDME_PROFILE")
+PROFILE_INTERVAL = float(os.environ.get("AROUNDME_PROFILE_INTERVAL", "0.01"))
+
+_NO_OP = nullcontext()
+
+
+class Metrics:
+    """Process-wide timers and counters, logged as JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._counters = Counter()
+        self._output = None
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._output is None:
+                # Ajout ligne par ligne : plusieurs processus peuvent partager le fichier
+                self._output = sys.stderr if self.path == "-" else open(self.path, "a", buffering=1)
+            self._output.write(line)
+
+    def record_time(self, name, seconds, fields):
+        with self._lock:
+            calls, total, longest = self._timers.get(name, (0, 0.0, 0.0))
+            self._timers[name] = (calls + 1, total + seconds, max(longest, seconds))
+        self._write({"ts": time.time(), "pid": os.getpid(), "type": "timer", "name": name, "ms": seconds * 1000, **fields})
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self):
+        """Aggregated timers (calls, total and max ms) and counters."""
+        with self._lock:
+            timers = {
+                name: {"calls": calls, "total_ms": total * 1000, "max_ms": longest * 1000}
+                for name, (calls, total, longest) in self._timers.items()
+            }
+            return {"timers": timers, "counters": dict(self._counters)}
+
+    def dump(self):
+        summary = self.snapshot()
+        if summary["timers"] or summary["counters"]:
+            self._write({"ts": time.time(), "pid": os.getpid(), "type": "summary", **summary})
+
+
+class _Timer:
+    __slots__ = ("name", "fields", "start")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        metrics.record_time(self.name, time.perf_counter() - self.start, self.fields)
+
+
+class SamplingProfiler:
+    """Background thread sampling the stacks of all the other threads."""
+
+    def __init__(self, path, interval=0.01):
+        self.path = path
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        with open(self.path.replace("{pid}", str(os.getpid())), "w") as file:
+            for stack, samples in self.samples.most_common():
+                file.write(f"{stack} {samples}\n")
+
+
+metrics = Metrics(METRICS_PATH) if METRICS_PATH else None
+profiler = SamplingProfiler(PROFILE_PATH, PROFILE_INTERVAL).start() if PROFILE_PATH else None
+if metrics is not None:
+    atexit.register(metrics.dump)
+if profiler is not None:
+    atexit.register(profiler.stop)
+
+
+def timed(name, **fields):
+    """Context manager timing a section: `with timed("nearby", dataset="parking"):`."""
+    if metrics is None:
+        return _NO_OP
+    return _Timer(name, fields)
+
+
+def timed_function(name):
+    """Decorator timing every call of a function; the function is returned as is when metrics are off."""
+    def decorate(function):
+        if metrics is None:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Timer(name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    """Adds `value` to a counter."""
+    if metrics is not None:
+        metrics.count(name, value)
@@ -0,0 +1,47 @@
+import re
+from functools import lru_cache
+
+import pandas as pd
+from unidecode import unidecode
+
+NON_WORD = re.compile(r'[^\w]')
+# Remplacements appliqués dans cet ordre, comme une chaîne de str.replace
+REPLACEMENTS = {
+    "de": "",
+    "av": "avenue",
+    "bd": "boulevard",
+    "pl": "place"
+}
+
+
+@lru_cache(maxsize=100_000)
+def _normalize(s):
+    s = unidecode(s)
+    s = NON_WORD.sub('', s)
+    s = s.lower()
+    for key, value in REPLACEMENTS.items():
+        s = s.replace(key, value)
+    return s
+
+
+def normalize_adress(s):
+    if pd.isna(s):
+        return ""
+    return _normalize(s)
+
+
+def normalize_series(values):
+    """
+    Normalizes a whole column like normalize_adress, row for row.
+    Each distinct value is normalized once, with the regex and replacements run
+    as vectorized string passes over the distinct values.
+    """
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    normalized = pd.Series(uniques, dtype=object).map(unidecode)
+    normalized = normalized.str.replace(NON_WORD, "", regex=True).str.lower()
+    for key, value in REPLACEMENTS.items():
+        normalized = normalized.str.replace(key, value, regex=False)
+    result = normalized.to_numpy(dtype=object)[codes]
+    result[codes == -1] = ""
+    return pd.Series(result, index=values.index, dtype=object)
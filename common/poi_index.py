@@ -0,0 +1,131 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common.compact import compact_frame
+from common.instrumentation import count
+from common.spatial_index import SpatialIndex
+from common.staged_io import read_coordinates, read_staged
+
+# Colonne du nom de chaque catégorie dans ses données intermédiaires ; une nouvelle catégorie s'ajoute ici
+POI_NAME_COLUMNS = {"parking": "nom", "toilets": "TYPE", "museum": "name", "sports": "name"}
+POI_COLUMNS = ["category", "poi_id", "name", "adresse", "adresse_normalized", "Ylat", "Xlong"]
+# Colonnes de la table unifiée utilisées par l'index spatial
+POI_INDEX_COLUMNS = ["category", "poi_id", "Ylat", "Xlong"]
+
+
+def build_poi_table(datasets, name_columns=POI_NAME_COLUMNS):
+    """
+    Stacks the staged POI tables of every category into one table with a common schema.
+    `poi_id` is the row position in the category's own table, as in the proximity table.
+    Columns missing from a dataset are filled with "not specified".
+    """
+    tables = []
+    for category, data in datasets.items():
+        name_column = name_columns.get(category, "name")
+        table = pd.DataFrame({
+            "category": category,
+            "poi_id": np.arange(len(data)),
+            "name": data[name_column] if name_column in data.columns else "not specified",
+            "adresse": data["adresse"] if "adresse" in data.columns else "not specified",
+            "adresse_normalized": data["adresse_normalized"] if "adresse_normalized" in data.columns else "",
+            "Ylat": data["Ylat"],
+            "Xlong": data["Xlong"],
+        })
+        tables.append(table.reset_index(drop=True))
+    if not tables:
+        return pd.DataFrame(columns=POI_COLUMNS)
+    return pd.concat(tables, ignore_index=True)[POI_COLUMNS]
+
+
+class PoiIndex(SpatialIndex):
+    """
+    Spatial index over the unified POI table: one grid lookup and one distance
+    computation answer every category around a point.
+    """
+
+    def __init__(self, poi_data, lat_col="Ylat", long_col="Xlong", cell_km=0.25, coordinates=None):
+        super().__init__(poi_data, lat_col, long_col, cell_km, coordinates)
+        # Codes dans l'ordre d'apparition, sans recopier les chaînes (la colonne peut être projetée depuis un fichier)
+        self.category_codes, categories = pd.factorize(self.data["category"])
+        self.categories = [str(category) for category in categories]
+        self.poi_ids = self.data["poi_id"].to_numpy()
+
+    def nearby_by_category(self, point, radius=1, limits=None, categories=None):
+        """
+        Returns {category: (poi_ids, distances, total)} for the POIs within `radius` km of
+        (lat, lon), nearest first. At most `limits[category]` POIs are kept per category
+        (all when absent); `total` counts them before the limit.
+        Only `categories` are returned when given.
+        """
+        limits = limits or {}
+        positions, distances = self.radius_positions(point, radius)
+        codes = self.category_codes[positions]
+        result = {}
+        for code, category in enumerate(self.categories):
+            if categories is not None and category not in categories:
+                continue
+            found = codes == code
+            limit = limits.get(category)
+            result[category] = (self.poi_ids[positions[found]][:limit], distances[found][:limit], int(found.sum()))
+        for category in categories or []:
+            result.setdefault(category, (np.empty(0, dtype=self.poi_ids.dtype), np.empty(0), 0))
+        return result
+
+
+def poi_table_matches(poi_data, datasets):
+    """
+    True when `poi_data` indexes exactly the rows of `datasets` ({category: staged table}): as many rows
+    per category as its table and every `poi_id` inside it. A table written by an older integration run does not.
+    """
+    codes, categories = pd.factorize(poi_data["category"])
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    found = {str(category): int(counts[code]) for code, category in enumerate(categories)}
+    if any(found.get(category, 0) != len(data) for category, data in datasets.items()):
+        return False
+    # Catégories absentes de `datasets` : jamais demandées, leurs identifiants ne sont pas vérifiés
+    sizes = np.array([len(datasets[category]) if category in datasets else np.iinfo(np.int64).max for category in found], dtype=np.int64)
+    poi_ids = poi_data["poi_id"].to_numpy(dtype=np.int64)
+    return bool(np.all(codes >= 0) and np.all((poi_ids >= 0) & (poi_ids < sizes[codes])))
+
+
+def load_poi_index(path, datasets):
+    """
+    Spatial index of the unified POI table written by the integrator at `path`, on its mapped coordinates,
+    or of the table built from `datasets` ({category: staged table}) when the integrator did not write it
+    or wrote it from other versions of the category tables.
+    """
+    if os.path.exists(path):
+        poi_data = read_staged(path, POI_INDEX_COLUMNS, mapped=True)
+        if poi_table_matches(poi_data, datasets):
+            coordinates = read_coordinates(path)
+            if coordinates is not None and coordinates.shape[1] != len(poi_data):
+                coordinates = None
+            return PoiIndex(compact_frame(poi_data), coordinates=coordinates)
+        print(f"{path} does not match the staged POI tables, rebuilding it from them", file=sys.stderr)
+    return PoiIndex(compact_frame(build_poi_table(datasets)))
+
+
+def find_nearby_pois(poi_index, proximity_table, typo, point, categories, radius=1, limit=None):
+    """
+    Returns {category: (poi_ids, distances, total)} of the POIs within `radius` km of a street, nearest first,
+    at most `limit` per category; `total` counts them before the limit.
+    The precomputed proximity table (or None) answers the categories it can; one pass over the POI index
+    around `point` (lat, lon) answers the others. A street without coordinates has no POI around it.
+    """
+    found = {}
+    if proximity_table is not None:
+        for category in categories:
+            hit = proximity_table.nearby(typo, category, radius, limit)
+            if hit is not None:
+                found[category] = hit
+        count("nearby.proximity_table", len(found))
+    missing = [category for category in categories if category not in found]
+    if missing and point is not None:
+        count("nearby.poi_index")
+        found.update(poi_index.nearby_by_category(point, radius, dict.fromkeys(missing, limit), missing))
+    for category in categories:
+        found.setdefault(category, (np.empty(0, dtype=np.int64), np.empty(0), 0))
+    return found
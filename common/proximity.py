@@ -0,0 +1,120 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common.compact import is_mapped
+from common.staged_io import read_staged, staged_exists
+
+# Rayon (km) précalculé par catégorie et nombre maximal de POI gardés par rue,
+# assez pour les consommateurs : 500 marqueurs sur la carte, 1000 résultats au plus par requête de l'API
+PROXIMITY_RADII = {"parking": 1, "toilets": 1, "museum": 1, "sports": 1}
+PROXIMITY_MAX_RESULTS = 1000
+
+
+def compute_proximity_table(street_data, poi_indexes, radii=PROXIMITY_RADII, max_results=PROXIMITY_MAX_RESULTS):
+    """
+    Computes, for every street, the nearest POIs of each category within its radius.
+    `poi_indexes` maps a category to a SpatialIndex whose data has a `poi_id` column.
+    Returns a long table with one (typo, category, poi_id, distance, total) row per neighbour,
+    `total` being the number of POIs of the category within the radius, before the `max_results` cut.
+    """
+    streets = street_data.drop_duplicates(subset="typo")
+    streets = streets[pd.to_numeric(streets["Ylat"], errors="coerce").notna()]
+    typos, categories, poi_ids, distances, totals = [], [], [], [], []
+    for category, index in poi_indexes.items():
+        radius = radii[category]
+        ids = index.data["poi_id"].to_numpy()
+        for typo, lat, lon in zip(streets["typo"], streets["Ylat"].astype(float), streets["Xlong"].astype(float)):
+            positions, street_distances = index.radius_positions((lat, lon), radius)
+            total = len(positions)
+            positions, street_distances = positions[:max_results], street_distances[:max_results]
+            typos.extend([typo] * len(positions))
+            categories.extend([category] * len(positions))
+            totals.extend([total] * len(positions))
+            poi_ids.append(ids[positions])
+            distances.append(street_distances)
+    # Rues et catégories en dictionnaires, 32 bits pour le reste : la copie Arrow projetée reste petite
+    return pd.DataFrame({
+        "typo": pd.Categorical(typos),
+        "category": pd.Categorical(categories),
+        "poi_id": np.concatenate(poi_ids).astype(np.int32) if poi_ids else np.empty(0, dtype=np.int32),
+        "distance": np.concatenate(distances).astype(np.float32) if distances else np.empty(0, dtype=np.float32),
+        "total": np.array(totals, dtype=np.int32),
+    })
+
+
+class ProximityTable:
+    """Keyed lookup of the precomputed street -> nearby POIs table."""
+
+    def __init__(self, proximity_data, radii=PROXIMITY_RADII):
+        self.radii = radii
+        if is_mapped(proximity_data["poi_id"]):
+            # Colonnes projetées depuis le fichier Arrow : des vues, partagées avec les autres processus
+            self._poi_ids = proximity_data["poi_id"].to_numpy()
+            self._distances = proximity_data["distance"].to_numpy()
+            self._totals = proximity_data["total"].to_numpy()
+        else:
+            # 32 bits suffisent : identifiants de lignes, distances (au millimètre près) et nombres de POI
+            self._poi_ids = proximity_data["poi_id"].to_numpy(dtype=np.int32)
+            self._distances = proximity_data["distance"].to_numpy(dtype=np.float32)
+            self._totals = proximity_data["total"].to_numpy(dtype=np.int32)
+        # L'intégrateur écrit les lignes d'une rue et d'une catégorie à la suite : chaque entrée est une tranche
+        typos, categories = proximity_data["typo"], proximity_data["category"]
+        change = (typos != typos.shift()) | (categories != categories.shift())
+        starts = np.flatnonzero(change.to_numpy(dtype=bool, na_value=True))
+        bounds = np.append(starts, len(proximity_data)).tolist()
+        keys = list(zip(typos.iloc[starts].to_numpy().tolist(), categories.iloc[starts].to_numpy().tolist()))
+        if len(set(keys)) == len(keys):
+            self._entries = {key: slice(start, stop) for key, start, stop in zip(keys, bounds[:-1], bounds[1:])}
+        else:
+            self._entries = proximity_data.groupby(["typo", "category"], sort=False).indices
+
+    def nearby(self, typo, category, radius=1, limit=None):
+        """
+        Returns (poi_ids, distances, total) of the POIs within `radius` km of the street, nearest first,
+        at most `limit` of them (all when None); `total` counts them before the limit.
+        Returns None when the precomputed table cannot answer: unknown category, larger radius,
+        or a street whose list was cut before reaching `limit` POIs or the end of `radius`.
+        """
+        if radius > self.radii.get(category, -1):
+            return None
+        rows = self._entries.get((typo, category), slice(0, 0))
+        poi_ids, distances = self._poi_ids[rows], self._distances[rows].astype(float)
+        total = int(self._totals[rows][0]) if len(poi_ids) else 0
+        if len(poi_ids) == total or distances[-1] > radius:
+            # Liste complète, ou coupée au-delà du rayon demandé : tous les POI du rayon sont là
+            keep = distances <= radius
+            poi_ids, distances, total = poi_ids[keep], distances[keep], int(keep.sum())
+        elif radius < self.radii[category] or limit is None or limit > len(poi_ids):
+            # Liste coupée dans le rayon : seul le total du rayon précalculé est connu, et `limit` POI doivent être gardés
+            return None
+        return poi_ids[:limit], distances[:limit], total
+
+
+def proximity_table_matches(proximity_data, datasets):
+    """
+    True when every `poi_id` of the proximity table is a row of its category's table in `datasets`
+    ({category: staged table}). A table computed from longer category tables than the loaded ones does not.
+    """
+    if "total" not in proximity_data.columns:
+        return False
+    largest = proximity_data.groupby("category", observed=True)["poi_id"].agg(["min", "max"])
+    return all(
+        category in datasets and bounds["min"] >= 0 and bounds["max"] < len(datasets[category])
+        for category, bounds in largest.iterrows()
+    )
+
+
+def load_proximity_table(path, datasets):
+    """
+    Precomputed street -> nearby POIs table written by the integrator at `path`, or None if it is missing
+    or does not match the staged category tables in `datasets` (written by another integration run).
+    """
+    if not staged_exists(path):
+        return None
+    proximity_data = read_staged(path, mapped=True)
+    if not proximity_table_matches(proximity_data, datasets):
+        print(f"{path} does not match the staged POI tables, ignoring it", file=sys.stderr)
+        return None
+    return ProximityTable(proximity_data)
@@ -0,0 +1,82 @@
+import threading
+
+from cachetools import TTLCache
+
+from common.instrumentation import count
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache counting the entries dropped for room (LRU) and for age (TTL) in the metrics."""
+
+    def __init__(self, name, maxsize, ttl, getsizeof=None):
+        super().__init__(maxsize, ttl, getsizeof=getsizeof)
+        self.name = name
+        self._clearing = False
+
+    def popitem(self):
+        item = super().popitem()
+        if not self._clearing:
+            count(f"cache.{self.name}.eviction")
+        return item
+
+    def clear(self):
+        # Vider le cache (nouvelle version des données) n'est pas une éviction
+        self._clearing = True
+        try:
+            super().clear()
+        finally:
+            self._clearing = False
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            count(f"cache.{self.name}.expiration", len(expired))
+        return expired
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache with a time to live, shared by every session of a process.
+    Entries belong to one version of the staged data: the first access with a newer
+    version drops them all, so reloaded data is never answered from stale results.
+    `maxsize` counts entries, or the sum of `getsizeof(value)` when given.
+    Hits, misses, evictions, expirations and invalidations are counted in the
+    AROUNDME_METRICS summary as `cache.<name>.<event>`.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=600, getsizeof=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._cache = _CountingTTLCache(name, maxsize, ttl, getsizeof)
+        self.version = None
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._cache:
+                count(f"cache.{self.name}.invalidation")
+            self._cache.clear()
+            self.version = version
+
+    def get_or_compute(self, key, version, compute):
+        """Returns the cached result of `key` for this data version, computing and storing it on a miss."""
+        with self._lock:
+            self._check_version(version)
+            value = self._cache.get(key)
+            if value is not None:
+                count(f"cache.{self.name}.hit")
+                return value
+        count(f"cache.{self.name}.miss")
+        # Calcul hors du verrou : deux sessions peuvent calculer la même entrée, la dernière gagne
+        value = compute()
+        with self._lock:
+            if version == self.version and value is not None:
+                try:
+                    self._cache[key] = value
+                except ValueError:
+                    # Valeur plus grande que le cache entier
+                    pass
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,79 @@
+import numpy as np
+
+from common.geo import EARTH_RADIUS_KM, RadiusQueryEngine, haversine_km
+
+
+class SpatialIndex(RadiusQueryEngine):
+    """
+    Uniform grid index over a POI table, built once per dataset.
+    Points are projected on a local equirectangular plane (km) and bucketed in
+    square cells, so a query only looks at the cells its radius overlaps.
+    """
+
+    def __init__(self, data, lat_col="Ylat", long_col="Xlong", cell_km=0.25, coordinates=None):
+        super().__init__(data, lat_col, long_col, coordinates)
+        self.cell_km = cell_km
+        self.ref_lat = float(np.mean(self.lat_rad)) if len(self) else 0.0
+        x, y = self._project(self.lat_rad, self.lon_rad)
+        cells = np.column_stack([np.floor(x / cell_km), np.floor(y / cell_km)]).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        keys, starts = np.unique(cells[order], axis=0, return_index=True)
+        bounds = np.append(starts, len(order))
+        self._cells = {
+            (int(cx), int(cy)): order[bounds[i]:bounds[i + 1]]
+            for i, (cx, cy) in enumerate(keys)
+        }
+        self._max_lat = float(np.max(np.abs(self.lat_rad))) if len(self) else 0.0
+
+    def _project(self, lat_rad, lon_rad):
+        x = EARTH_RADIUS_KM * lon_rad * np.cos(self.ref_lat)
+        y = EARTH_RADIUS_KM * lat_rad
+        return x, y
+
+    def _candidates(self, lat, lon, radius):
+        """Positions of the POIs in the cells overlapped by the radius around (lat, lon) in radians."""
+        # Marge sur x : un degré de longitude rétrécit quand la latitude augmente
+        widest_lat = min(max(abs(lat), self._max_lat) + radius / EARTH_RADIUS_KM, np.radians(89))
+        dx = radius * np.cos(self.ref_lat) / np.cos(widest_lat)
+        x, y = self._project(lat, lon)
+        cx0, cx1 = int(np.floor((x - dx) / self.cell_km)), int(np.floor((x + dx) / self.cell_km))
+        cy0, cy1 = int(np.floor((y - radius) / self.cell_km)), int(np.floor((y + radius) / self.cell_km))
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            keys = [key for key in self._cells if cx0 <= key[0] <= cx1 and cy0 <= key[1] <= cy1]
+        else:
+            keys = [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1) if (cx, cy) in self._cells]
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._cells[key] for key in keys])
+
+    def radius_positions(self, point, km=1):
+        """Returns (positions in `self.data`, distances) of the POIs within `km` of (lat, lon), nearest first."""
+        lat, lon = np.radians(point[0]), np.radians(point[1])
+        positions = self._candidates(lat, lon, km)
+        distances = haversine_km(lat, lon, self.lat_rad[positions], self.lon_rad[positions])
+        keep = distances <= km
+        order = np.argsort(distances[keep], kind="stable")
+        return positions[keep][order], distances[keep][order]
+
+    def within_radius(self, point, km=1):
+        """Returns the POIs within `km` of (lat, lon), nearest first, with a float `distance` column."""
+        return self._select(*self.radius_positions(point, km))
+
+    def k_nearest(self, point, k=5):
+        """Returns the `k` POIs closest to (lat, lon), nearest first, with a float `distance` column."""
+        if k <= 0 or len(self) == 0:
+            return self._select(np.empty(0, dtype=np.int64), np.empty(0))
+        if k >= len(self):
+            return self.query(point, np.inf)
+        # On double le rayon jusqu'à avoir k résultats : le coût suit le nombre de voisins
+        radius = self.cell_km
+        while True:
+            result = self.within_radius(point, radius)
+            if len(result) >= k:
+                return result.head(k)
+            radius *= 2
+
+    def query(self, point, radius=1):
+        if np.isinf(radius):
+            return super().query(point, radius)
+        return self.within_radius(point, radius)
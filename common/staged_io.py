@@ -0,0 +1,205 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Tables intermédiaires écrites par l'intégrateur : jeux de données, puis tables dérivées
+STAGED_TABLES = ["street", "parking", "toilets", "museum", "sports", "proximity", "poi"]
+
+
+def get_parquet_path(csv_path):
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def get_arrow_path(csv_path):
+    return Path(csv_path).with_suffix(".arrow")
+
+
+def get_coordinates_path(csv_path):
+    return Path(csv_path).with_name(Path(csv_path).stem + "_coordinates.npy")
+
+
+def _temporary_path(path):
+    return path.with_name(path.name + ".tmp")
+
+
+def _is_fresh(path, csv_path):
+    """True when `path` exists and is at least as recent as the CSV."""
+    return path.exists() and (not csv_path.exists() or path.stat().st_mtime >= csv_path.stat().st_mtime)
+
+
+def _arrow_safe(data):
+    """Casts object columns mixing types (e.g. postal codes and "not specified") to strings, as a CSV reload would."""
+    data = data.copy()
+    for column in data.select_dtypes(include=["object"]).columns:
+        if pd.api.types.infer_dtype(data[column], skipna=True) != "string":
+            data[column] = data[column].astype(str)
+    return data
+
+
+def _staged_paths(csv_path, csv=True):
+    """CSV (unless `csv` is False), Parquet and Arrow paths of a staged dataset, in the order they are published."""
+    copies = [get_parquet_path(csv_path), get_arrow_path(csv_path)]
+    return [Path(csv_path), *copies] if csv else copies
+
+
+def _publish(csv_path, csv=True):
+    """Replaces the staged files by their complete temporary versions (the copies last, so they stay the most recent)."""
+    # Remplacement atomique : les lecteurs, y compris ceux qui projettent l'ancien fichier Arrow, ne voient jamais de fichier partiel
+    for path in _staged_paths(csv_path, csv):
+        os.replace(_temporary_path(path), path)
+    if not csv:
+        # Le CSV d'une version précédente n'est plus à jour
+        Path(csv_path).unlink(missing_ok=True)
+
+
+def _discard(csv_path, csv=True):
+    """Removes the temporary files of an interrupted write; the previous staged files stay in place."""
+    for path in _staged_paths(csv_path, csv):
+        _temporary_path(path).unlink(missing_ok=True)
+
+
+def staged_exists(csv_path):
+    """True when a staged dataset was written, as CSV or only as its Parquet and Arrow copies."""
+    return any(path.exists() for path in _staged_paths(csv_path))
+
+
+def write_staged(data, csv_path, csv=True):
+    """
+    Writes a staged dataset as CSV, with a typed Parquet copy and an Arrow IPC copy next to it.
+    Without `csv`, only the copies are written: for large tables read by the applications only.
+    """
+    csv_path, parquet_path, arrow_path = _staged_paths(csv_path)
+    try:
+        if csv:
+            data.to_csv(_temporary_path(csv_path), index=False)
+        data = _arrow_safe(data)
+        data.to_parquet(_temporary_path(parquet_path), index=False)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        with pa.OSFile(str(_temporary_path(arrow_path)), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    except BaseException:
+        _discard(csv_path, csv)
+        raise
+    _publish(csv_path, csv)
+
+
+def write_coordinates(data, csv_path, lat_col="Ylat", long_col="Xlong"):
+    """Writes the latitudes and longitudes (radians, shape (2, rows)) of a staged dataset as a .npy file next to it."""
+    coordinates = np.radians(np.vstack([
+        pd.to_numeric(data[lat_col], errors="coerce").to_numpy(dtype=float),
+        pd.to_numeric(data[long_col], errors="coerce").to_numpy(dtype=float),
+    ]))
+    path = get_coordinates_path(csv_path)
+    with open(_temporary_path(path), "wb") as file:
+        np.save(file, coordinates)
+    os.replace(_temporary_path(path), path)
+
+
+def read_coordinates(csv_path):
+    """Maps the coordinates written by `write_coordinates` read-only, or returns None if they are missing or stale."""
+    csv_path = Path(csv_path)
+    path = get_coordinates_path(csv_path)
+    if not _is_fresh(path, csv_path):
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def _read_mapped(arrow_path, columns=None):
+    """
+    Maps an Arrow IPC file read-only. Every column stays backed by the mapped file (pd.ArrowDtype),
+    so the processes reading the same file share its pages in the OS cache instead of holding copies.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(arrow_path))).read_all()
+    if columns is not None:
+        table = table.select([column for column in columns if column in table.schema.names])
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def read_staged(csv_path, columns=None, mapped=False):
+    """
+    Reads a staged dataset, keeping only `columns` (missing ones are ignored).
+    With `mapped`, the Arrow IPC copy is mapped instead of read when it is at least as recent as the CSV.
+    Otherwise the Parquet copy is used when it is at least as recent as the CSV.
+    """
+    csv_path = Path(csv_path)
+    arrow_path = get_arrow_path(csv_path)
+    if mapped and _is_fresh(arrow_path, csv_path):
+        return _read_mapped(arrow_path, columns)
+    parquet_path = get_parquet_path(csv_path)
+    if _is_fresh(parquet_path, csv_path):
+        if columns is not None:
+            available = set(pq.read_schema(parquet_path).names)
+            columns = [column for column in columns if column in available]
+        return pd.read_parquet(parquet_path, columns=columns)
+    if columns is None:
+        return pd.read_csv(csv_path)
+    wanted = set(columns)
+    return pd.read_csv(csv_path, usecols=lambda column: column in wanted)
+
+
+class StagedWriter:
+    """
+    Appends chunks to a staged dataset (CSV, Parquet and Arrow) without holding the whole table in memory.
+    Use as a context manager: the files are published when the block ends without error, an empty
+    dataset if no chunk was appended, and left untouched when it raises.
+    """
+
+    def __init__(self, csv_path, columns=None):
+        self.csv_path = Path(csv_path)
+        self.columns = columns
+        self._parquet_writer = None
+        self._arrow_file = None
+        self._arrow_writer = None
+        self._schema = None
+
+    def __enter__(self):
+        return self
+
+    def append(self, data):
+        if data.empty:
+            return
+        data = _arrow_safe(data)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        if self._parquet_writer is None:
+            data.to_csv(_temporary_path(self.csv_path), index=False)
+            self._schema = table.schema
+            self._parquet_writer = pq.ParquetWriter(str(_temporary_path(get_parquet_path(self.csv_path))), self._schema)
+            self._arrow_file = pa.OSFile(str(_temporary_path(get_arrow_path(self.csv_path))), "wb")
+            self._arrow_writer = pa.ipc.new_file(self._arrow_file, self._schema)
+        else:
+            data.to_csv(_temporary_path(self.csv_path), mode="a", header=False, index=False)
+            table = table.cast(self._schema)
+        self._parquet_writer.write_table(table)
+        self._arrow_writer.write_table(table)
+
+    def _close_writers(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._arrow_writer.close()
+            self._arrow_file.close()
+
+    def close(self):
+        """Publishes the complete dataset."""
+        if self._parquet_writer is None:
+            write_staged(pd.DataFrame(columns=self.columns), self.csv_path)
+            return
+        self._close_writers()
+        _publish(self.csv_path)
+
+    def abort(self):
+        """Drops what was appended; the previous staged files stay in place."""
+        try:
+            self._close_writers()
+        finally:
+            _discard(self.csv_path)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,136 @@
+import heapq
+import json
+import re
+import unicodedata
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from common.normalization import normalize_adress
+
+# Rue résolue : son nom officiel, ses lignes dans les données et ses coordonnées (lat, lon)
+ResolvedStreet = namedtuple("ResolvedStreet", ["typo", "data", "coords"])
+
+
+def fold_street_name(name):
+    """Uppercases a street name, strips accents and collapses punctuation into single spaces."""
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Z0-9]+", " ", name.upper()).strip()
+
+
+def trigrams(name):
+    """Returns the set of padded character trigrams of a folded street name."""
+    padded = f"  {fold_street_name(name)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to street names, used for suggestions.
+    Candidates are pruned by trigram overlap before being ranked with the same
+    SequenceMatcher ratio as difflib.get_close_matches.
+    """
+
+    def __init__(self, names, postings=None):
+        self.names = list(names)
+        if postings is None:
+            postings = {}
+            for name_id, name in enumerate(self.names):
+                for gram in trigrams(name):
+                    postings.setdefault(gram, []).append(name_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = np.zeros(len(self.names), dtype=np.int32)
+        for ids in self.postings.values():
+            self.gram_counts[ids] += 1
+
+    @classmethod
+    def from_street_data(cls, street_data, column="typo"):
+        """Builds the index over the unique street names of the staged street data."""
+        return cls(sorted(street_data[column].dropna().astype(str).unique()))
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, query, max_candidates=50):
+        """Returns the ids of the names sharing the most trigrams with `query` (Dice coefficient)."""
+        query_grams = trigrams(query)
+        grams = [gram for gram in query_grams if gram in self.postings]
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+        shared = np.bincount(np.concatenate([self.postings[gram] for gram in grams]), minlength=len(self.names))
+        hits = np.flatnonzero(shared)
+        dice = 2 * shared[hits] / (len(query_grams) + self.gram_counts[hits])
+        if len(hits) > max_candidates:
+            best = np.argpartition(-dice, max_candidates - 1)[:max_candidates]
+            hits = hits[best]
+        return hits
+
+    def suggest(self, query, k=3, cutoff=0.6, max_candidates=50):
+        """Returns up to `k` street names close to `query`, best first, like difflib.get_close_matches."""
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+        scored = []
+        for name_id in self.candidates(query, max_candidates):
+            name = self.names[name_id]
+            matcher.set_seq1(name)
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                score = matcher.ratio()
+                if score >= cutoff:
+                    scored.append((score, name))
+        return [name for _, name in heapq.nlargest(k, scored)]
+
+    def save(self, path):
+        """Writes the index as JSON so it can be built once by the integrator."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "names": self.names,
+                "postings": {gram: ids.tolist() for gram, ids in self.postings.items()},
+            }, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index written by `save`."""
+        with open(path, "r", encoding="utf-8") as file:
+            content = json.load(file)
+        return cls(content["names"], content["postings"])
+
+
+def group_positions(values):
+    """{value: positions of its rows}, like `groupby(...).indices` but also fast on Arrow-backed strings."""
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1)).tolist()
+    return {key: order[start:stop] for key, start, stop in zip(uniques.to_numpy().tolist(), bounds[:-1], bounds[1:])}
+
+
+class StreetLookup:
+    """
+    Hash index resolving a street name to its rows and coordinates in O(1).
+    Names are looked up by exact `typo` first, then by `typo_normalized`.
+    """
+
+    def __init__(self, street_data):
+        self.street_data = street_data
+        self._by_typo = group_positions(street_data["typo"])
+        self._by_normalized = {}
+        if "typo_normalized" in street_data.columns:
+            groups = {key: positions[0] for key, positions in group_positions(street_data["typo_normalized"]).items() if key}
+            typos = street_data["typo"].iloc[list(groups.values())].to_numpy().tolist()
+            self._by_normalized = dict(zip(groups, typos))
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def resolve(self, name):
+        """Returns the ResolvedStreet matching `name`, or None."""
+        typo = name.strip().upper()
+        if typo not in self._by_typo:
+            typo = self._by_normalized.get(normalize_adress(name))
+            if typo is None:
+                return None
+        data = self.street_data.iloc[self._by_typo[typo]]
+        coords = pd.to_numeric(pd.Series([data["Ylat"].iloc[0], data["Xlong"].iloc[0]]), errors="coerce")
+        coords = None if coords.isna().any() else (float(coords[0]), float(coords[1]))
+        return ResolvedStreet(typo, data, coords)
@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+import time
+
+from common.instrumentation import count, timed
+
+
+def google_translate(text, dest="en"):
+    """Default backend: remote translation through googletrans."""
+    from googletrans import Translator
+    return Translator().translate(text, dest=dest).text
+
+
+class TranslationCache:
+    """
+    Persistent (text, target language) -> translation cache stored in SQLite.
+    The least recently used entries are evicted once `max_entries` is exceeded.
+    """
+
+    def __init__(self, path, max_entries=50_000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "text TEXT NOT NULL, dest TEXT NOT NULL, translation TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (text, dest))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._connection.commit()
+
+    def get(self, text, dest):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT translation FROM translations WHERE text = ? AND dest = ?", (text, dest)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE translations SET last_used = ? WHERE text = ? AND dest = ?", (time.time(), text, dest)
+            )
+            self._connection.commit()
+            return row[0]
+
+    def set(self, text, dest, translation):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", (text, dest, translation, time.time())
+            )
+            (count,) = self._connection.execute("SELECT COUNT(*) FROM translations").fetchone()
+            if count > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (count - self.max_entries,)
+                )
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+class CachedTranslator:
+    """
+    Translates texts through a pluggable backend, a callable (text, dest) -> str,
+    and remembers the results in an optional on-disk cache.
+    """
+
+    def __init__(self, cache_path=None, backend=google_translate, max_entries=50_000):
+        self.backend = backend
+        self.cache = TranslationCache(cache_path, max_entries) if cache_path else None
+
+    def translate(self, text, dest="en"):
+        if not isinstance(text, str) or not text.strip():
+            return text
+        if self.cache is not None:
+            translation = self.cache.get(text, dest)
+            if translation is not None:
+                count("translation.cache_hit")
+                return translation
+            count("translation.cache_miss")
+        with timed("translation.backend", dest=dest):
+            translation = self.backend(text, dest)
+        if self.cache is not None:
+            self.cache.set(text, dest, translation)
+        return translation
+
+
+def translated_column(data, column, translator, dest="en"):
+    """Returns the pre-translated `<column>_<dest>` column when the integrator produced it, else translates."""
+    pretranslated = f"{column}_{dest}"
+    if pretranslated in data.columns:
+        return data[pretranslated]
+    return data[column].apply(translator.translate, dest=dest)
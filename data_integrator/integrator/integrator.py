@@ -1,5 +1,20 @@
-from utils import get_data_path, load_json_data, normalize_adress, fill_string_not_specified
+from utils import get_artifact_path, get_data_path, normalize_series, read_geojson_columns, fill_string_not_specified
+import argparse
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 import pandas as pd
+from manifest import Manifest, code_version
+from common.instrumentation import timed
+from common.poi_index import POI_NAME_COLUMNS, build_poi_table
+from common.proximity import PROXIMITY_MAX_RESULTS, PROXIMITY_RADII, compute_proximity_table
+from common.spatial_index import SpatialIndex
+from common.staged_io import StagedWriter, get_arrow_path, get_coordinates_path, get_parquet_path, read_staged, write_coordinates, write_staged
+from common.street_index import TrigramIndex
+from common.translation import CachedTranslator
 
 # Traitement des données de rue
 def process_street_data():
@@ -8,68 +23,263 @@ def process_street_data():
     street_data = street_data[columns_to_keep]
     street_data["Ylat"] = street_data["geo_point_2d"].str.split(', ', expand=True)[0].astype(float)
     street_data["Xlong"] = street_data["geo_point_2d"].str.split(', ', expand=True)[1].astype(float)
-    street_data["typo_normalized"] = street_data["typo"].apply(normalize_adress)
+    street_data["typo_normalized"] = normalize_series(street_data["typo"])
     street_data = fill_string_not_specified(street_data)
-    street_data.to_csv(get_data_path("street", "staged"), index=False)
+    write_staged(street_data, get_data_path("street", "staged"))
 
-# Traitement des données de parking
-def process_parking_data():
-    parking_data = pd.read_csv(get_data_path("parking"), sep=";")
-    parking_data = parking_data[parking_data["insee"].astype(str).str.startswith("75")].copy()
+# Colonnes de la base nationale des parkings utilisées en aval, lues en texte
+PARKING_COLUMNS = ["id", "nom", "insee", "adresse", "gratuit", "nb_places", "nb_pmr", "hauteur_max", "type_ouvrage",
+                   "Xlong", "Ylat", "tarif_1h", "tarif_2h", "tarif_3h", "tarif_4h", "tarif_24h"]
+# Colonnes numériques et leur type : une cellule invalide devient une valeur manquante au lieu de faire échouer l'étape
+PARKING_NUMERIC = {
+    "gratuit": "float64", "nb_places": "Int64", "nb_pmr": "float64", "hauteur_max": "Int64",
+    "Xlong": "float64", "Ylat": "float64",
+    "tarif_1h": "float64", "tarif_2h": "float64", "tarif_3h": "float64", "tarif_4h": "float64", "tarif_24h": "float64",
+}
+PARKING_CHUNK_SIZE = 50_000
+
+def coerce_numeric(data, dtypes):
+    """Parses text columns as numbers; unparsable cells, and fractions in integer columns, become missing."""
+    for column, dtype in dtypes.items():
+        values = pd.to_numeric(data[column], errors="coerce")
+        if dtype == "Int64":
+            values = values.where(values % 1 == 0)
+        data[column] = values.astype(dtype)
+    return data
+
+def transform_parking_chunk(parking_data):
+    parking_data = parking_data[parking_data["insee"].str.startswith("75", na=False)].copy()
+    parking_data = coerce_numeric(parking_data, PARKING_NUMERIC)
     parking_data["gratuit"] = parking_data["gratuit"].map({1: "yes", 0: "no"})
-    parking_data["Arrondissement"] = parking_data["insee"].astype(str).str[-2:] + "e"
-    parking_data["adresse_normalized"] = parking_data["adresse"].apply(normalize_adress)
-    parking_data = fill_string_not_specified(parking_data)
-    parking_data.to_csv(get_data_path("parking", "staged"), index=False)
+    parking_data["Arrondissement"] = parking_data["insee"].str[-2:] + "e"
+    parking_data["adresse_normalized"] = normalize_series(parking_data["adresse"])
+    return fill_string_not_specified(parking_data)
+
+# Traitement des données de parking : lecture par morceaux, seules les lignes de Paris sont gardées
+def process_parking_data(chunksize=PARKING_CHUNK_SIZE):
+    chunks = pd.read_csv(
+        get_data_path("parking"), sep=";", chunksize=chunksize,
+        usecols=lambda column: column in PARKING_COLUMNS, dtype=str,
+    )
+    columns = [*PARKING_COLUMNS, "Arrondissement", "adresse_normalized"]
+    with StagedWriter(get_data_path("parking", "staged"), columns) as writer:
+        for chunk in chunks:
+            writer.append(transform_parking_chunk(chunk))
 
 # Traitement des données de toilettes publiques
 def process_toilets_data():
     toilets_data = pd.read_csv(get_data_path("toilets"), sep=";")
-    toilets_data["adresse_normalized"] = toilets_data["ADRESSE"].apply(normalize_adress)
+    toilets_data["adresse_normalized"] = normalize_series(toilets_data["ADRESSE"])
     toilets_data["ACCES_PMR"] = toilets_data["ACCES_PMR"].map({"Oui": "yes", "Non": "no"})
     toilets_data[["Ylat", "Xlong"]] = toilets_data["geo_point_2d"].str.split(', ', expand=True).astype(float)
     toilets_data["adresse"] = toilets_data["ADRESSE"]
     toilets_data = fill_string_not_specified(toilets_data)
-    toilets_data.to_csv(get_data_path("toilets", "staged"), index=False)
+    write_staged(toilets_data, get_data_path("toilets", "staged"))
+
+# Propriétés GeoJSON extraites pour les musées
+MUSEUM_FIELDS = {
+    "name": lambda properties: properties.get("l_ep_min", "not specified"),
+    "adresse": lambda properties: properties.get("adresse", "not specified"),
+    "c_postal": lambda properties: properties.get("c_postal", "not specified"),
+}
 
 # Traitement des données de musées
 def process_museum_data():
-    museum_data_raw_path = get_data_path("museum")
-    museum_data = load_json_data(museum_data_raw_path)
-    museum_data = pd.DataFrame({
-        "Xlong": [feature["geometry"]["coordinates"][0] for feature in museum_data["features"]],
-        "Ylat": [feature["geometry"]["coordinates"][1] for feature in museum_data["features"]],
-        "name": [feature["properties"].get("l_ep_min", "not specified") for feature in museum_data["features"]],
-        "adresse": [feature["properties"].get("adresse", "not specified") for feature in museum_data["features"]],
-        "c_postal": [feature["properties"].get("c_postal", "not specified") for feature in museum_data["features"]],
-    })
-    museum_data["adresse_normalized"] = museum_data["adresse"].apply(normalize_adress)
+    museum_data = read_geojson_columns(get_data_path("museum"), MUSEUM_FIELDS)
+    museum_data["adresse_normalized"] = normalize_series(museum_data["adresse"])
     museum_data_filtered = museum_data[museum_data["c_postal"].astype(str).str.startswith("75")].copy()
     museum_data_filtered = fill_string_not_specified(museum_data_filtered)
-    museum_data_filtered.to_csv(get_data_path("museum", "staged"), index=False)
+    write_staged(museum_data_filtered, get_data_path("museum", "staged"))
+
+# Morceaux de l'adresse des équipements sportifs, dans l'ordre
+SPORTS_ADDRESS_KEYS = ["n_voie", "c_suf1", "c_suf2", "c_suf3", "c_desi", "c_liaison", "l_voie"]
+
+# Propriétés GeoJSON extraites pour les équipements sportifs
+SPORTS_FIELDS = {
+    "name": lambda properties: properties["l_ep_maj"],
+    "adresse": lambda properties: " ".join(f"{properties.get(key, '')}" for key in SPORTS_ADDRESS_KEYS),
+    "annee_creation": lambda properties: properties["d_annee_cr"],
+    "public": lambda properties: properties["b_public"],
+    "c_postal": lambda properties: properties["c_postal"],
+}
 
 # Traitement des données de sport
 def process_sports_data():
-    sports_data_raw_path = get_data_path("sports")
-    sports_data = load_json_data(sports_data_raw_path)
-    sports_data_df = pd.DataFrame({
-    "Xlong": [feature["geometry"]["coordinates"][0] for feature in sports_data["features"]],
-    "Ylat": [feature["geometry"]["coordinates"][1] for feature in sports_data["features"]],
-    "name": [feature["properties"]["l_ep_maj"] for feature in sports_data["features"]],
-    "adresse": [f"{feature['properties'].get('n_voie', '')} {feature['properties'].get('c_suf1', '')} {feature['properties'].get('c_suf2', '')} {feature['properties'].get('c_suf3', '')} {feature['properties'].get('c_desi', '')} {feature['properties'].get('c_liaison', '')} {feature['properties'].get('l_voie', '')}" for feature in sports_data["features"]],
-    "annee_creation": [feature["properties"]["d_annee_cr"] for feature in sports_data["features"]],
-    "public": [feature["properties"]["b_public"] for feature in sports_data["features"]],
-    "c_postal": [feature["properties"]["c_postal"] for feature in sports_data["features"]],
-})
-    sports_data_df["adresse_normalized"] = sports_data_df["adresse"].apply(normalize_adress) # vérifier
+    sports_data_df = read_geojson_columns(get_data_path("sports"), SPORTS_FIELDS)
+    sports_data_df["adresse_normalized"] = normalize_series(sports_data_df["adresse"]) # vérifier
     sports_data_df = fill_string_not_specified(sports_data_df)
-    sports_data_df.to_csv(get_data_path("sports", "staged"), index=False)
+    write_staged(sports_data_df, get_data_path("sports", "staged"))
+
+# Tables intermédiaires écrites sans CSV : la table de proximité, volumineuse, n'est lue que par les applications
+STAGED_CSV = {"proximity": False}
+
+# Précalcul des POI proches de chaque rue
+def process_proximity_data(radii=PROXIMITY_RADII, max_results=PROXIMITY_MAX_RESULTS):
+    street_data = read_staged(get_data_path("street", "staged"), columns=["typo", "Ylat", "Xlong"])
+    poi_indexes = {}
+    for category in radii:
+        poi_data = read_staged(get_data_path(category, "staged"), columns=["Ylat", "Xlong"])
+        poi_data["poi_id"] = range(len(poi_data))
+        poi_indexes[category] = SpatialIndex(poi_data)
+    proximity_data = compute_proximity_table(street_data, poi_indexes, radii, max_results)
+    write_staged(proximity_data, get_data_path("proximity", "staged"), csv=STAGED_CSV["proximity"])
+
+# Table unique des POI de toutes les catégories, pour les recherches en une passe,
+# et ses coordonnées en radians, projetées telles quelles par les processus de l'application
+def process_poi_data():
+    datasets = {
+        category: read_staged(get_data_path(category, "staged"), columns=[name_column, "adresse", "adresse_normalized", "Ylat", "Xlong"])
+        for category, name_column in POI_NAME_COLUMNS.items()
+    }
+    poi_data = build_poi_table(datasets)
+    write_staged(poi_data, get_data_path("poi", "staged"))
+    write_coordinates(poi_data, get_data_path("poi", "staged"))
+
+# Index des trigrammes pour les suggestions de noms de rue
+def process_street_index():
+    street_data = read_staged(get_data_path("street", "staged"), columns=["typo"])
+    TrigramIndex.from_street_data(street_data).save(get_artifact_path("street_index.json"))
+
+# Traduction anticipée des textes des rues, pour qu'aucune recherche n'appelle le traducteur
+def process_street_translations(columns=("historique", "orig"), dest="en"):
+    street_data = read_staged(get_data_path("street", "staged"))
+    translator = CachedTranslator(get_artifact_path("translation_cache.sqlite"))
+    failures = []
+
+    def translate(text):
+        # Un texte non traduit garde sa version d'origine, les autres traductions sont conservées
+        try:
+            return translator.translate(text, dest=dest)
+        except Exception as e:
+            failures.append(e)
+            return text
+
+    for column in columns:
+        translations = {text: translate(text) for text in street_data[column].unique()}
+        street_data[f"{column}_{dest}"] = street_data[column].map(translations)
+    write_staged(street_data, get_data_path("street", "staged"))
+    if failures:
+        # Étape incomplète : le manifeste ne l'enregistre pas, elle sera relancée à la prochaine intégration
+        return f"{len(failures)} texts left untranslated ({failures[0]})"
+
+# Jeux de données indépendants, intégrés en parallèle
+DATASET_STAGES = {
+    "street": process_street_data,
+    "parking": process_parking_data,
+    "toilets": process_toilets_data,
+    "museum": process_museum_data,
+    "sports": process_sports_data,
+}
+
+# Étapes dérivées, lancées ensuite dans l'ordre, avec les jeux de données dont elles dépendent et leurs sorties
+DERIVED_STAGES = {
+    "street_translations": (process_street_translations, ["street"], []),
+    "proximity": (process_proximity_data, ["street", "parking", "toilets", "museum", "sports"], ["proximity"]),
+    "poi": (process_poi_data, ["parking", "toilets", "museum", "sports"], ["poi", get_coordinates_path(get_data_path("poi", "staged"))]),
+    "street_index": (process_street_index, ["street"], [get_artifact_path("street_index.json")]),
+}
+
+# Sources dont dépend le résultat de l'intégration : les modifier relance tout
+CODE_FILES = [*Path(__file__).resolve().parent.glob("*.py"), *(Path(__file__).resolve().parents[2] / "common").glob("*.py")]
+
+def staged_files(data_name):
+    staged_path = get_data_path(data_name, "staged")
+    copies = [get_parquet_path(staged_path), get_arrow_path(staged_path)]
+    return [staged_path, *copies] if STAGED_CSV.get(data_name, True) else copies
+
+def stage_files(name):
+    """Returns the (inputs, outputs) files of a stage, tracked by the manifest."""
+    if name in DATASET_STAGES:
+        return [get_data_path(name)], staged_files(name)
+    _, dependencies, outputs = DERIVED_STAGES[name]
+    inputs = [get_data_path(dependency, "staged") for dependency in dependencies]
+    outputs = [file for output in outputs for file in (staged_files(output) if isinstance(output, str) else [output])]
+    return inputs, outputs
+
+def run_stage(name):
+    """
+    Runs one stage and returns (name, duration in seconds, error traceback or None, incomplete or None).
+    A stage returns a message instead of None when its outputs were written but are incomplete.
+    """
+    stage = DATASET_STAGES[name] if name in DATASET_STAGES else DERIVED_STAGES[name][0]
+    start = time.perf_counter()
+    try:
+        with timed("integrator.stage", stage=name):
+            incomplete = stage()
+        return name, time.perf_counter() - start, None, incomplete
+    except Exception:
+        return name, time.perf_counter() - start, traceback.format_exc(), None
+
+def report(name, duration, error, incomplete=None):
+    if incomplete is not None:
+        print(f"[{name}] incomplete after {duration:.2f}s, it will run again: {incomplete}")
+    elif error is None:
+        print(f"[{name}] done in {duration:.2f}s")
+    else:
+        print(f"[{name}] failed after {duration:.2f}s:\n{error}")
+
+def run_integration(workers=None, force=False):
+    """
+    Integrates the datasets concurrently in a process pool, then runs the derived stages.
+    Stages whose inputs, outputs and code are unchanged since their last run are skipped,
+    unless `force` is set. A failing dataset does not stop the others; its dependent
+    stages are skipped. Incomplete stages are not recorded, so the next run retries them.
+    Returns {stage name: (duration, error)}.
+    """
+    manifest = Manifest(get_artifact_path("integration_manifest.json"), code_version(CODE_FILES))
+    results = {}
+    incomplete = set()
+    to_run = []
+    for name in DATASET_STAGES:
+        if not force and manifest.is_fresh(name, *stage_files(name)):
+            results[name] = (0.0, None)
+            print(f"[{name}] unchanged, skipped")
+        else:
+            to_run.append(name)
+    if to_run:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_stage, name): name for name in to_run}
+            for future in as_completed(futures):
+                try:
+                    name, duration, error, unfinished = future.result()
+                except Exception:
+                    name, duration, error, unfinished = futures[future], 0.0, traceback.format_exc(), None
+                results[name] = (duration, error)
+                if unfinished is not None:
+                    incomplete.add(name)
+                report(name, duration, error, unfinished)
+    for name, (_, dependencies, _) in DERIVED_STAGES.items():
+        failed = [dependency for dependency in dependencies if results[dependency][1] is not None]
+        if failed:
+            results[name] = (0.0, f"skipped because {', '.join(failed)} failed")
+            print(f"[{name}] skipped because {', '.join(failed)} failed")
+            continue
+        if not force and manifest.is_fresh(name, *stage_files(name)):
+            results[name] = (0.0, None)
+            print(f"[{name}] unchanged, skipped")
+            continue
+        _, duration, error, unfinished = run_stage(name)
+        results[name] = (duration, error)
+        if unfinished is not None:
+            incomplete.add(name)
+        report(name, duration, error, unfinished)
+    # Les empreintes sont prises à la fin : une étape dérivée peut réécrire les données d'un jeu (traductions)
+    for name, (_, error) in results.items():
+        if error is None and name not in incomplete:
+            manifest.record(name, *stage_files(name))
+        else:
+            manifest.forget(name)
+    manifest.save()
+    return results
 
 # Exécution des processus
 if __name__ == "__main__":
-    process_street_data()
-    process_parking_data()
-    process_toilets_data()
-    process_museum_data()
-    process_sports_data()
+    parser = argparse.ArgumentParser(description="Integrate the raw datasets into staged data.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of datasets integrated in parallel.")
+    parser.add_argument("--force", action="store_true", help="Reprocess every dataset, even if unchanged.")
+    args = parser.parse_args()
+    results = run_integration(args.workers, args.force)
+    if any(error is not None for _, error in results.values()):
+        print("Integration finished with errors.")
+        sys.exit(1)
     print("Integration done!")
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version(paths):
+    """Hash of the source files of the integration, so that a code or config change reprocesses everything."""
+    digest = hashlib.sha256()
+    for path in sorted(str(path) for path in paths):
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Records, for each integration stage, the content hashes of its inputs and outputs
+    and the code version that produced them. A stage whose inputs, outputs and code
+    are unchanged since its last successful run can be skipped.
+    """
+
+    def __init__(self, path, version):
+        self.path = Path(path)
+        self.version = version
+        self.stages = {}
+        self.files = {}
+        if self.path.exists():
+            with open(self.path, "r") as file:
+                content = json.load(file)
+            self.stages = content.get("stages", {})
+            self.files = content.get("files", {})
+
+    def hash(self, path):
+        """Content hash of a file, or None if missing. Unchanged (size, mtime) reuse the recorded hash."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        known = self.files.get(str(path))
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+        digest = file_hash(path)
+        self.files[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def is_fresh(self, name, inputs, outputs):
+        entry = self.stages.get(name)
+        if entry is None or entry["code_version"] != self.version:
+            return False
+        current = {str(path): self.hash(path) for path in [*inputs, *outputs]}
+        if None in current.values():
+            return False
+        return current == {**entry["inputs"], **entry["outputs"]}
+
+    def record(self, name, inputs, outputs):
+        self.stages[name] = {
+            "code_version": self.version,
+            "inputs": {str(path): self.hash(path) for path in inputs},
+            "outputs": {str(path): self.hash(path) for path in outputs},
+        }
+
+    def forget(self, name):
+        self.stages.pop(name, None)
+
+    def save(self):
+        """Writes the manifest atomically: the app and the API reload the data when it changes."""
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "w") as file:
+            json.dump({"stages": self.stages, "files": self.files}, file, indent=2)
+        os.replace(temporary, self.path)
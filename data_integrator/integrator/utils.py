@@ -1,24 +1,12 @@
 import pandas as pd
 import json
 import re
+import sys
+from array import array
 from pathlib import Path
-from unidecode import unidecode
 
-def normalize_adress(s):
-    if pd.isna(s):
-        return ""
-    s = unidecode(s)  
-    s = re.sub(r'[^\w]', '', s)
-    s = s.lower()
-    replacements = {
-        "de": "",
-        "av": "avenue",
-        "bd": "boulevard",
-        "pl": "place"
-    }
-    for key, value in replacements.items():
-        s = s.replace(key, value)
-    return s
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.normalization import normalize_series
 
 def fill_string_not_specified(data):
     category_columns = data.select_dtypes(include=["object"]).columns
@@ -29,6 +17,58 @@ def get_data_path(data_name, stage="raw"):
     base_path = Path("../../data")
     return base_path / f"{data_name}_data_{stage}.{'csv' if stage != 'raw' else 'json' if data_name in ['museum', 'sports'] else 'csv'}"
 
-def load_json_data(file_path):
+def get_artifact_path(file_name):
+    return Path("../../data") / file_name
+
+FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+
+def iter_geojson_features(file_path, chunk_size=1 << 16):
+    """Yields the features of a GeoJSON FeatureCollection one by one, reading the file by chunks."""
+    decoder = json.JSONDecoder()
     with open(file_path, "r") as file:
-        return json.load(file)
\ No newline at end of file
+        buffer = ""
+        # Début du tableau "features"
+        while True:
+            match = FEATURES_START.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            buffer = buffer[-32:] + chunk
+        eof = False
+        while True:
+            position = 0
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            buffer = buffer[position:]
+            if buffer.startswith("]"):
+                return
+            try:
+                feature, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield feature
+            buffer = buffer[end:]
+
+def read_geojson_columns(file_path, fields):
+    """
+    Builds a DataFrame in a single pass over the GeoJSON features.
+    Coordinates go to float arrays; `fields` maps each other column to a function of the feature properties.
+    """
+    longitudes, latitudes = array("d"), array("d")
+    columns = {name: [] for name in fields}
+    for feature in iter_geojson_features(file_path):
+        coordinates = feature["geometry"]["coordinates"]
+        longitudes.append(coordinates[0])
+        latitudes.append(coordinates[1])
+        properties = feature["properties"]
+        for name, extract in fields.items():
+            columns[name].append(extract(properties))
+    return pd.DataFrame({"Xlong": longitudes, "Ylat": latitudes, **columns})
@@ -0,0 +1,167 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+# Fichiers bruts et leurs sources
+SOURCES = {
+    "street_data_raw.csv": "https://opendata.paris.fr/api/explore/v2.1/catalog/datasets/denominations-emprises-voies-actuelles/exports/csv?delimiter=%2C&list_separator=%2C&quote_all=false&with_bom=true",
+    "parking_data_raw.csv": "https://static.data.gouv.fr/resources/base-nationale-des-lieux-de-stationnement/20240109-111856/base-nationale-des-lieux-de-stationnement-outil-de-consolidation-bnls-v2.csv",
+    "toilets_data_raw.csv": "https://opendata.paris.fr/api/explore/v2.1/catalog/datasets/sanisettesparis/exports/csv?use_labels=true",
+    "museum_data_raw.json": "https://carto2.apur.org/apur/rest/services/OPENDATA/LIEUX_CULTURELS/MapServer/0/query?outFields=*&where=1%3D1&f=geojson",
+    "sports_data_raw.json": "https://carto2.apur.org/apur/rest/services/OPENDATA/EQUIPEMENT_PONCTUEL/MapServer/3/query?outFields=*&where=1%3D1&f=geojson",
+}
+DATA_DIR = Path("../data")
+STATE_FILE = "download_state.json"
+BLOCK_SIZE = 1 << 20
+
+
+def read_config(path="loader.conf"):
+    """Reads the key=value settings of loader.conf."""
+    config = {}
+    with open(path, "r") as file:
+        for line in file:
+            if "=" in line and not line.lstrip().startswith("#"):
+                key, value = line.split("=", 1)
+                config[key.strip()] = value.strip()
+    return config
+
+
+def sha256sum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DownloadState:
+    """Validators (ETag / Last-Modified), sizes and checksums of the downloaded files, shared by the download threads."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._files = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def get(self, name):
+        with self._lock:
+            return dict(self._files.get(name, {}))
+
+    def update(self, name, **values):
+        with self._lock:
+            self._files.setdefault(name, {}).update(values)
+            temporary = self.path.with_name(self.path.name + ".tmp")
+            temporary.write_text(json.dumps(self._files, indent=2))
+            os.replace(temporary, self.path)
+
+
+def _is_intact(destination, known):
+    """The local file is the one we recorded (same size, same checksum)."""
+    if not destination.exists() or "sha256" not in known:
+        return False
+    return destination.stat().st_size == known.get("size") and sha256sum(destination) == known["sha256"]
+
+
+def download(name, url, data_dir, state, refresh=True, timeout=60):
+    """
+    Downloads one source into `data_dir`. Returns "skipped", "not modified", "downloaded" or "resumed".
+    Unchanged files are detected with conditional requests, an interrupted transfer is resumed
+    from its .part file, and the file is only replaced once complete.
+    """
+    destination = Path(data_dir) / name
+    partial = destination.with_name(name + ".part")
+    if destination.exists() and not refresh:
+        return "skipped"
+    known = state.get(name)
+    headers = {"accept": "*/*"}
+    offset = 0
+    resume_from = known.get("partial") or {}
+    if partial.exists() and (resume_from.get("etag") or resume_from.get("last_modified")):
+        offset = partial.stat().st_size
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = resume_from.get("etag") or resume_from["last_modified"]
+    elif _is_intact(destination, known):
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    try:
+        response = urlopen(Request(url, headers=headers), timeout=timeout)
+    except HTTPError as e:
+        if e.code == 304:
+            return "not modified"
+        if e.code == 416 and offset:
+            # La partie téléchargée ne correspond plus au fichier distant : on recommence
+            partial.unlink()
+            state.update(name, partial=None)
+            return download(name, url, data_dir, state, refresh, timeout)
+        raise
+
+    with response:
+        content_range = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+        resumed = response.status == 206 and content_range is not None and int(content_range.group(1)) == offset
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if not resumed:
+            offset = 0
+            state.update(name, partial=validators)
+        length = response.headers.get("Content-Length")
+        expected = offset + int(length) if length is not None else None
+        with open(partial, "ab" if resumed else "wb") as file:
+            for block in iter(lambda: response.read(BLOCK_SIZE), b""):
+                file.write(block)
+
+    if expected is not None and partial.stat().st_size != expected:
+        raise IOError(f"{name}: incomplete transfer ({partial.stat().st_size}/{expected} bytes), it will be resumed")
+    checksum = sha256sum(partial)
+    os.replace(partial, destination)
+    state.update(name, **validators, sha256=checksum, size=destination.stat().st_size, partial=None)
+    return "resumed" if resumed else "downloaded"
+
+
+def run(sources, data_dir=DATA_DIR, refresh=True, workers=None, timeout=60):
+    """Downloads all sources concurrently. Returns {file name: status or exception}."""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    state = DownloadState(data_dir / STATE_FILE)
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers or len(sources)) as executor:
+        futures = {executor.submit(download, name, url, data_dir, state, refresh, timeout): name for name, url in sources.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                print(f"{name}: {results[name]}")
+            except Exception as e:
+                results[name] = e
+                print(f"{name}: download failed: {e}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the raw datasets.")
+    parser.add_argument("--config", default="loader.conf")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    refresh = read_config(args.config).get("overwrite") == "true"
+    if refresh:
+        print("Overwrite is set to true. Files are refreshed when they changed on the server.")
+    else:
+        print("Overwrite is set to false. So if the data already exists, it will not be downloaded again.")
+    results = run(SOURCES, args.data_dir, refresh, args.workers)
+    missing = [name for name in SOURCES if not (Path(args.data_dir) / name).exists()]
+    if missing:
+        print(f"Error: missing raw data: {', '.join(missing)}")
+        raise SystemExit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
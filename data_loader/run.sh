@@ -1,2 +1,2 @@
 echo "--------STEP 1: Downloading data---------"
-bash ./data_loader.sh
+python3 loader.py
@@ -0,0 +1,135 @@
+import argparse
+import codecs
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+from processor import find_street_pois, load_context, process_street_data
+from common.address_matcher import AddressMatcher
+
+CATEGORIES = ["parking", "museum", "toilets", "sports"]
+STREET_FIELDS = ["typo", "historique", "orig", "arrdt", "quartier", "Ylat", "Xlong"]
+# Colonnes internes qui ne sont pas renvoyées
+HIDDEN_COLUMNS = ["adresse_normalized", "typo_match", "Description"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer many street lookups with datasets loaded once, as JSON Lines.")
+    parser.add_argument("--input", default="-", help="File with one street name per line ('-' for stdin).")
+    parser.add_argument("--output", default="-", help="JSON Lines output file ('-' for stdout).")
+    parser.add_argument("--radius", type=float, default=None, help="Search places within this radius (km) instead of matching addresses.")
+    parser.add_argument("--pick-first", action="store_true", help="Use the best suggestion when a street is not found.")
+    parser.add_argument("--serve", action="store_true", help="Worker mode: answer each input line as soon as it is read.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Number of streets answered together in batch mode.")
+    return parser.parse_args()
+
+
+def resolve_street(context, name, pick_first=False):
+    """Resolve a street name without prompting. Returns (street, status, suggestions)."""
+    research = name.strip().upper()
+    street = context["street_lookup"].resolve(research)
+    if street is not None:
+        return street, "found", []
+    suggestions = context["street_index"].suggest(research, k=3, cutoff=0.6)
+    if suggestions and pick_first:
+        return context["street_lookup"].resolve(suggestions[0]), "suggested", suggestions
+    return None, "suggestions" if suggestions else "not_found", suggestions
+
+
+def to_records(data):
+    """Convert result rows to JSON-friendly dicts (missing values become null)."""
+    data = data.drop(columns=[column for column in HIDDEN_COLUMNS if column in data.columns])
+    data = data.astype(object).where(data.notna(), None)
+    return data.to_dict("records")
+
+
+def answer(context, queries, radius=None, pick_first=False):
+    """Answer a list of street names; yields one result dict per name, in order."""
+    resolved = [resolve_street(context, query, pick_first) for query in queries]
+    if "records" not in context:
+        # Lignes converties une seule fois par jeu de données, comme l'API
+        context["records"] = {category: to_records(context["datasets"][category]) for category in CATEGORIES}
+    records = context["records"]
+    if radius is None:
+        # Un seul automate pour toutes les rues du lot, une seule passe sur les adresses de tous les jeux de données
+        patterns = [pattern for street, _, _ in resolved if street is not None for pattern in street.data["typo_normalized"].astype(str)]
+        matcher = AddressMatcher(patterns)
+        poi_data = context["poi_data"]
+        positions = matcher.positions_by_pattern(poi_data["adresse_normalized"])
+        poi_categories = poi_data["category"].to_numpy()
+        poi_ids = poi_data["poi_id"].to_numpy()
+    for query, (street, status, suggestions) in zip(queries, resolved):
+        result = {"query": query, "status": status, "suggestions": suggestions}
+        if street is not None:
+            street_data = process_street_data(street.data.copy())
+            result["street"] = {field: None if pd.isna(value) else value for field, value in street_data[STREET_FIELDS].iloc[0].items()}
+            if radius is None:
+                patterns = street.data["typo_normalized"].astype(str).unique()
+                rows = np.unique(np.concatenate([positions[pattern] for pattern in patterns]))
+                for category in CATEGORIES:
+                    result[category] = [records[category][position] for position in poi_ids[rows[poi_categories[rows] == category]]]
+            else:
+                found = find_street_pois(context["datasets"], street_data, radius, context["proximity_table"], context["poi_index"])
+                for category in CATEGORIES:
+                    positions, distances, _ = found[category]
+                    result[category] = [
+                        {**records[category][position], "distance": float(distance)} for position, distance in zip(positions, distances)
+                    ]
+        yield result
+
+
+def write_result(output, result):
+    output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+
+
+def run_batch(context, lines, output, args):
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(line.strip())
+        if len(chunk) >= args.chunk_size:
+            for result in answer(context, chunk, args.radius, args.pick_first):
+                write_result(output, result)
+            chunk = []
+    if chunk:
+        for result in answer(context, chunk, args.radius, args.pick_first):
+            write_result(output, result)
+
+
+def run_worker(context, lines, output, args):
+    """Answer each line as soon as it arrives: a street name, or a JSON object {"street": ..., "radius": ...}."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line) if line.startswith("{") else {"street": line}
+            radius = request.get("radius", args.radius)
+            result = next(answer(context, [request["street"]], radius, request.get("pick_first", args.pick_first)))
+        except Exception as e:
+            result = {"query": line, "status": "error", "error": str(e)}
+        write_result(output, result)
+        output.flush()
+
+
+def main():
+    args = parse_args()
+    context = load_context()
+    lines = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = codecs.getwriter("utf-8")(sys.stdout.buffer) if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.serve:
+            run_worker(context, lines, output, args)
+        else:
+            run_batch(context, lines, output, args)
+    finally:
+        output.flush()
+        if args.input != "-":
+            lines.close()
+        if args.output != "-":
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,49 @@
-import pandas as pd
 import sys
-from difflib import get_close_matches
 import codecs
-from utils import get_staged_data_path, translate_text
+import os
+from utils import get_artifact_path, get_staged_data_path, translator
+from common.address_matcher import AddressMatcher
+from common.instrumentation import timed_function
+from common.poi_index import build_poi_table, find_nearby_pois, load_poi_index, poi_table_matches
+from common.proximity import load_proximity_table
+from common.staged_io import read_staged
+from common.street_index import StreetLookup, TrigramIndex
+from common.translation import translated_column
 
 
+# Colonnes utilisées par le processeur, les seules chargées
+DATA_COLUMNS = {
+    "street": ["typo", "typo_normalized", "historique", "orig", "historique_en", "orig_en", "arrdt", "quartier", "Ylat", "Xlong"],
+    "parking": ["nom", "adresse", "adresse_normalized", "nb_places", "tarif_1h", "tarif_2h", "tarif_3h", "tarif_4h", "tarif_24h", "gratuit", "Ylat", "Xlong"],
+    "museum": ["name", "adresse", "adresse_normalized", "Ylat", "Xlong"],
+    "toilets": ["ADRESSE", "adresse_normalized", "ACCES_PMR", "Ylat", "Xlong"],
+    "sports": ["name", "adresse", "adresse_normalized", "Ylat", "Xlong"],
+}
+
+
+@timed_function("processor.load_data")
 def load_data():
-    """Load all required datasets."""
+    """Load all required datasets, mapping their Arrow copies when the integrator wrote them."""
     try:
-        street_data = pd.read_csv(get_staged_data_path("street"))
-        parking_data = pd.read_csv(get_staged_data_path("parking"), sep=",")
-        museum_data = pd.read_csv(get_staged_data_path("museum"))
-        toilets_data = pd.read_csv(get_staged_data_path("toilets"))
-        sports_data = pd.read_csv(get_staged_data_path("sports"))
+        street_data = read_staged(get_staged_data_path("street"), DATA_COLUMNS["street"], mapped=True)
+        parking_data = read_staged(get_staged_data_path("parking"), DATA_COLUMNS["parking"], mapped=True)
+        museum_data = read_staged(get_staged_data_path("museum"), DATA_COLUMNS["museum"], mapped=True)
+        toilets_data = read_staged(get_staged_data_path("toilets"), DATA_COLUMNS["toilets"], mapped=True)
+        sports_data = read_staged(get_staged_data_path("sports"), DATA_COLUMNS["sports"], mapped=True)
         return street_data, parking_data, museum_data, toilets_data, sports_data
     except FileNotFoundError as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 
+def load_street_index(street_data):
+    """Load the prebuilt street name index, or build it from the street data."""
+    path = get_artifact_path("street_index.json")
+    if os.path.exists(path):
+        return TrigramIndex.load(path)
+    return TrigramIndex.from_street_data(street_data)
+
+
 def get_user_input():
     """Retrieve and validate user input."""
     if len(sys.argv) < 2:
@@ -27,11 +52,24 @@ def get_user_input():
     return sys.argv[1].strip().upper()
 
 
-def find_closest_match(research, data, column):
+def get_radius():
+    """Retrieve the optional search radius (km) given as second argument."""
+    if len(sys.argv) < 3:
+        return None
+    try:
+        return float(sys.argv[2])
+    except ValueError:
+        print("Error: The radius must be a number of kilometers.")
+        sys.exit(1)
+
+
+@timed_function("street.resolve")
+def find_closest_match(research, street_lookup, street_index):
     """Find exact or close matches in the data."""
-    if research not in data[column].values:
+    street = street_lookup.resolve(research)
+    if street is None:
         print(f"No exact match found for '{research}'. Looking for close matches...")
-        suggestions = get_close_matches(research, data[column].unique(), n=3, cutoff=0.6)
+        suggestions = street_index.suggest(research, k=3, cutoff=0.6)
         if suggestions:
             print("Did you mean one of the following?")
             for i, suggestion in enumerate(suggestions, 1):
@@ -40,7 +78,7 @@ def find_closest_match(research, data, column):
         else:
             print("No close matches found. Exiting script.")
             sys.exit(1)
-    return [research]
+    return [street.typo]
 
 
 def select_match(suggestions):
@@ -61,11 +99,12 @@ def select_match(suggestions):
         sys.exit(1)
 
 
+@timed_function("street.translate")
 def process_street_data(street_data):
     """Process street data to filter and enhance it."""
     if not street_data.empty:
-        street_data["historique"] = street_data["historique"].apply(translate_text)
-        street_data["orig"] = street_data["orig"].apply(translate_text)
+        street_data["historique"] = translated_column(street_data, "historique", translator)
+        street_data["orig"] = translated_column(street_data, "orig", translator)
         street_data["Description"] = (
             "Historical name: " + street_data["historique"].astype(str) + "\n" +
             "Original name: " + street_data["orig"].astype(str) + "\n" +
@@ -75,12 +114,8 @@ def process_street_data(street_data):
     return street_data
 
 
-def process_parking_data(parking_data, typo_list):
-    """Process parking data to filter and enhance it."""
-    parking_data["typo_match"] = parking_data["adresse_normalized"].apply(
-        lambda x: next((typo for typo in typo_list if typo in x), None)
-    )
-    filtered_parking_data = parking_data[parking_data["typo_match"].notna()].copy()
+def describe_parking_data(filtered_parking_data):
+    """Add a printable description to parking data."""
     if not filtered_parking_data.empty:
         filtered_parking_data["Description"] = (
             "Name: " + filtered_parking_data["nom"].astype(str) + "\n" +
@@ -96,12 +131,8 @@ def process_parking_data(parking_data, typo_list):
     return filtered_parking_data
 
 
-def process_museum_data(museum_data, typo_list):
-    """Process museum data to filter and enhance it."""
-    museum_data["typo_match"] = museum_data["adresse_normalized"].apply(
-        lambda x: next((typo for typo in typo_list if typo in x), None)
-    )
-    filtered_museum_data = museum_data[museum_data["typo_match"].notna()].copy()
+def describe_museum_data(filtered_museum_data):
+    """Add a printable description to museum data."""
     if not filtered_museum_data.empty:
         filtered_museum_data["Description"] = (
             "Name: " + filtered_museum_data["name"].astype(str) + "\n" +
@@ -110,12 +141,8 @@ def process_museum_data(museum_data, typo_list):
     return filtered_museum_data
 
 
-def process_toilets_data(toilets_data, typo_list):
-    """Process toilets data to filter and enhance it."""
-    toilets_data["typo_match"] = toilets_data["adresse_normalized"].astype(str).apply(
-        lambda x: next((typo for typo in typo_list if typo in x), None)
-    )
-    filtered_toilets_data = toilets_data[toilets_data["typo_match"].notna()].copy()
+def describe_toilets_data(filtered_toilets_data):
+    """Add a printable description to toilets data."""
     if not filtered_toilets_data.empty:
         filtered_toilets_data["Description"] = (
             "Address: " + filtered_toilets_data["ADRESSE"].astype(str) + "\n" +
@@ -123,12 +150,8 @@ def process_toilets_data(toilets_data, typo_list):
         )
     return filtered_toilets_data
 
-def process_sports_data(sports_data, typo_list):
-    """Process sports data to filter and enhance it."""
-    sports_data["typo_match"] = sports_data["adresse_normalized"].astype(str).apply(
-        lambda x: next((typo for typo in typo_list if typo in x), None)
-    )
-    filtered_sports_data = sports_data[sports_data["typo_match"].notna()].copy()
+def describe_sports_data(filtered_sports_data):
+    """Add a printable description to sports data."""
     if not filtered_sports_data.empty:
         filtered_sports_data["Description"] = (
             "Name: " + filtered_sports_data["name"].astype(str) + "\n" +
@@ -137,13 +160,73 @@ def process_sports_data(sports_data, typo_list):
     return filtered_sports_data
 
 
+def load_poi_data(datasets):
+    """Load the unified POI table written by the integrator, or build it from the datasets if missing or stale."""
+    path = get_staged_data_path("poi")
+    if os.path.exists(path):
+        poi_data = read_staged(path, ["category", "poi_id", "adresse_normalized", "Ylat", "Xlong"], mapped=True)
+        if poi_table_matches(poi_data, datasets):
+            return poi_data
+    return build_poi_table(datasets)
+
+
+@timed_function("processor.match.pois")
+def match_poi_data(poi_data, datasets, matcher):
+    """Match the addresses of every category in one pass. Returns {category: matched rows}."""
+    matched = poi_data[matcher.match(poi_data["adresse_normalized"]).notna()]
+    return {
+        category: data.iloc[matched.loc[matched["category"] == category, "poi_id"].to_numpy()].copy()
+        for category, data in datasets.items()
+    }
+
+
+@timed_function("nearby")
+def find_street_pois(datasets, street_data, radius, proximity_table=None, poi_index=None):
+    """Return {category: (positions, distances, total)} of the places within `radius` km of the street, nearest first."""
+    street = street_data.iloc[0]
+    if poi_index is None:
+        poi_index = load_poi_index(get_staged_data_path("poi"), datasets)
+    point = None if street[["Ylat", "Xlong"]].isna().any() else (float(street["Ylat"]), float(street["Xlong"]))
+    return find_nearby_pois(poi_index, proximity_table, street["typo"], point, list(datasets), radius)
+
+
+def get_nearby_data(datasets, street_data, radius, proximity_table=None, poi_index=None):
+    """Return {category: rows within `radius` km of the street, nearest first}."""
+    found = find_street_pois(datasets, street_data, radius, proximity_table, poi_index)
+    nearby = {}
+    for category, (poi_ids, distances, _) in found.items():
+        rows = datasets[category].iloc[poi_ids].copy()
+        rows["distance"] = distances
+        nearby[category] = rows
+    return nearby
+
+
+@timed_function("processor.load_context")
+def load_context():
+    """Load the datasets once, with the indexes shared by every query of the batch and worker modes."""
+    street_data, parking_data, museum_data, toilets_data, sports_data = load_data()
+    datasets = {"parking": parking_data, "museum": museum_data, "toilets": toilets_data, "sports": sports_data}
+    poi_data = load_poi_data(datasets)
+    return {
+        "street_data": street_data,
+        "datasets": datasets,
+        "street_lookup": StreetLookup(street_data),
+        "street_index": load_street_index(street_data),
+        "poi_data": poi_data,
+        "poi_index": load_poi_index(get_staged_data_path("poi"), datasets),
+        "proximity_table": load_proximity_table(get_staged_data_path("proximity"), datasets),
+    }
+
+
 def main():
     sys.stdout = codecs.getwriter("utf-8")(sys.stdout.buffer)
     research = get_user_input()
+    radius = get_radius()
     print(f"Extracting information about {research}...")
 
     street_data, parking_data, museum_data, toilets_data, sports_data = load_data()
-    suggestions = find_closest_match(research, street_data, "typo")
+    street_lookup = StreetLookup(street_data)
+    suggestions = find_closest_match(research, street_lookup, load_street_index(street_data))
 
     if len(suggestions) > 1:
         research = select_match(suggestions)
@@ -151,18 +234,26 @@ def main():
         research = suggestions[0]
 
     print(f"Exact match found for '{research}'")
-    filtered_street_data = street_data[street_data["typo"] == research].copy()
-    if filtered_street_data.empty:
+    street = street_lookup.resolve(research)
+    if street is None:
         print(f"No data found for '{research}'. This should not happen if a suggestion was accepted.")
         sys.exit(1)
 
-    filtered_street_data = process_street_data(filtered_street_data)
+    filtered_street_data = process_street_data(street.data.copy())
     typo_list = filtered_street_data["typo_normalized"].tolist()
 
-    filtered_parking_data = process_parking_data(parking_data, typo_list)
-    filtered_museum_data = process_museum_data(museum_data, typo_list)
-    filtered_toilets_data = process_toilets_data(toilets_data, typo_list)
-    filtered_sports_data = process_sports_data(sports_data, typo_list)
+    datasets = {"parking": parking_data, "museum": museum_data, "toilets": toilets_data, "sports": sports_data}
+    if radius is None:
+        # Un seul automate et une seule passe sur les adresses des quatre jeux de données
+        filtered = match_poi_data(load_poi_data(datasets), datasets, AddressMatcher(typo_list))
+    else:
+        print(f"Looking for places within {radius} km of the street...")
+        poi_index = load_poi_index(get_staged_data_path("poi"), datasets)
+        filtered = get_nearby_data(datasets, filtered_street_data, radius, load_proximity_table(get_staged_data_path("proximity"), datasets), poi_index)
+    filtered_parking_data = describe_parking_data(filtered["parking"])
+    filtered_museum_data = describe_museum_data(filtered["museum"])
+    filtered_toilets_data = describe_toilets_data(filtered["toilets"])
+    filtered_sports_data = describe_sports_data(filtered["sports"])
     
     print("\n------------------RESULTS------------------")
     print("Street Information:")
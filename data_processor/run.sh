@@ -1,3 +1,2 @@
 echo "--------STEP 3: Processing  data---------"
 python processor.py "$1"
-sleep 1
@@ -1,8 +1,13 @@
-from googletrans import Translator
+import sys
+from pathlib import Path
 
-def translate_text(text, dest='en'):
-    translator = Translator()
-    return translator.translate(text, dest=dest).text
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from common.translation import CachedTranslator
+
+translator = CachedTranslator("../data/translation_cache.sqlite")
 
 def get_staged_data_path(data_name):
-    return f"../data/{data_name}_data_staged.csv"
\ No newline at end of file
+    return f"../data/{data_name}_data_staged.csv"
+
+def get_artifact_path(file_name):
+    return f"../data/{file_name}"
@@ -0,0 +1,124 @@
+import re
+import sys
+import threading
+from http.client import IncompleteRead
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "data_loader"))
+from loader import DownloadState, download
+
+CONTENT = bytes(range(256)) * 64
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """Serves `server.body` with an ETag, conditional requests and byte ranges, like the open data portals."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body, etag = server.body, server.etag
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        requested = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if requested and self.headers.get("If-Range", etag) == etag:
+            start = int(requested.group(1))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            self._send_body(body[start:], etag)
+            return
+        self.send_response(200)
+        self._send_body(body, etag)
+
+    def _send_body(self, body, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # Connexion coupée après `cut_after` octets : transfert incomplet
+        cut_after = self.server.cut_after
+        self.wfile.write(body if cut_after is None else body[:cut_after])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def source():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SourceHandler)
+    server.body, server.etag, server.cut_after, server.requests = CONTENT, '"v1"', None, []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_port}/data.csv"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def state(tmp_path):
+    return DownloadState(tmp_path / "download_state.json")
+
+
+def test_unchanged_file_is_not_downloaded_again(source, state, tmp_path):
+    assert download("data.csv", source.url, tmp_path, state) == "downloaded"
+    assert download("data.csv", source.url, tmp_path, state) == "not modified"
+    assert source.requests[-1]["If-None-Match"] == '"v1"'
+    assert (tmp_path / "data.csv").read_bytes() == CONTENT
+
+
+def test_changed_file_is_downloaded_again(source, state, tmp_path):
+    download("data.csv", source.url, tmp_path, state)
+    source.body, source.etag = CONTENT[::-1], '"v2"'
+    assert download("data.csv", source.url, tmp_path, state) == "downloaded"
+    assert (tmp_path / "data.csv").read_bytes() == CONTENT[::-1]
+
+
+def test_incomplete_transfer_is_resumed(source, state, tmp_path):
+    source.cut_after = 5000
+    with pytest.raises((OSError, IncompleteRead)):
+        download("data.csv", source.url, tmp_path, state)
+    assert not (tmp_path / "data.csv").exists()
+    assert (tmp_path / "data.csv.part").read_bytes() == CONTENT[:5000]
+
+    source.cut_after = None
+    assert download("data.csv", source.url, tmp_path, state) == "resumed"
+    assert source.requests[-1]["Range"] == "bytes=5000-"
+    assert source.requests[-1]["If-Range"] == '"v1"'
+    assert (tmp_path / "data.csv").read_bytes() == CONTENT
+    assert not (tmp_path / "data.csv.part").exists()
+    assert state.get("data.csv")["partial"] is None
+
+
+def test_partial_file_of_an_older_version_is_restarted(source, state, tmp_path):
+    source.cut_after = 5000
+    with pytest.raises((OSError, IncompleteRead)):
+        download("data.csv", source.url, tmp_path, state)
+
+    # If-Range ne correspond plus : le serveur renvoie le nouveau fichier entier
+    source.body, source.etag, source.cut_after = CONTENT[::-1], '"v2"', None
+    assert download("data.csv", source.url, tmp_path, state) == "downloaded"
+    assert (tmp_path / "data.csv").read_bytes() == CONTENT[::-1]
+    assert state.get("data.csv")["etag"] == '"v2"'
+
+
+def test_unsatisfiable_range_restarts_the_download(source, state, tmp_path):
+    (tmp_path / "data.csv.part").write_bytes(CONTENT + b"stale tail")
+    state.update("data.csv", partial={"etag": '"v1"', "last_modified": None})
+    assert download("data.csv", source.url, tmp_path, state) == "downloaded"
+    assert [request.get("Range") for request in source.requests] == [f"bytes={len(CONTENT) + 10}-", None]
+    assert (tmp_path / "data.csv").read_bytes() == CONTENT
+
+
+def test_existing_file_is_kept_without_refresh(source, state, tmp_path):
+    (tmp_path / "data.csv").write_bytes(b"local copy")
+    assert download("data.csv", source.url, tmp_path, state, refresh=False) == "skipped"
+    assert source.requests == []
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from common.geo import haversine_km
+from common.proximity import ProximityTable, compute_proximity_table
+from common.spatial_index import SpatialIndex
+
+RADII = {"parking": 1, "museum": 1}
+MAX_RESULTS = 8
+
+
+def random_points(rng, count):
+    """Points around the centre of Paris, dense enough for the lists of most streets to be cut."""
+    return pd.DataFrame({"Ylat": 48.8566 + rng.normal(0, 0.006, count), "Xlong": 2.3522 + rng.normal(0, 0.009, count)})
+
+
+@pytest.fixture(scope="module")
+def world():
+    rng = np.random.default_rng(7)
+    pois = {"parking": random_points(rng, 400), "museum": random_points(rng, 15)}
+    for data in pois.values():
+        data["poi_id"] = np.arange(len(data))
+    streets = random_points(rng, 60)
+    streets["typo"] = [f"RUE {i}" for i in range(len(streets))]
+    proximity_data = compute_proximity_table(streets, {category: SpatialIndex(data) for category, data in pois.items()}, RADII, MAX_RESULTS)
+    return pois, streets, ProximityTable(proximity_data, RADII)
+
+
+def brute_force(data, lat, lon, radius):
+    """(poi_ids, distances) of every POI within `radius` km, nearest first, by scanning the whole table."""
+    distances = haversine_km(np.radians(lat), np.radians(lon), np.radians(data["Ylat"].to_numpy()), np.radians(data["Xlong"].to_numpy()))
+    keep = np.flatnonzero(distances <= radius)
+    order = np.argsort(distances[keep], kind="stable")
+    return keep[order], distances[keep][order]
+
+
+@pytest.mark.parametrize("radius", [0.1, 0.2, 0.35, 0.5, 1])
+@pytest.mark.parametrize("limit", [None, 3, MAX_RESULTS, MAX_RESULTS + 1])
+def test_nearby_matches_a_full_scan_or_declines(world, radius, limit):
+    pois, streets, table = world
+    answered = 0
+    for typo, lat, lon in zip(streets["typo"], streets["Ylat"], streets["Xlong"]):
+        for category, data in pois.items():
+            expected_ids, expected_distances = brute_force(data, lat, lon, radius)
+            hit = table.nearby(typo, category, radius, limit)
+            within_precomputed = brute_force(data, lat, lon, RADII[category])[0]
+            cut = len(within_precomputed) > MAX_RESULTS
+            if hit is None:
+                # Seule une liste coupée dans le rayon demandé peut refuser de répondre
+                assert cut and len(expected_ids) >= MAX_RESULTS
+                assert radius < RADII[category] or limit is None or limit > MAX_RESULTS
+                continue
+            answered += 1
+            poi_ids, distances, total = hit
+            assert total == len(expected_ids)
+            assert poi_ids.tolist() == expected_ids[:limit].tolist()
+            np.testing.assert_allclose(distances, expected_distances[:limit], atol=1e-6)
+    assert answered
+
+
+def test_cut_list_answers_the_precomputed_radius_within_its_size(world):
+    pois, streets, table = world
+    typo, lat, lon = streets.iloc[0][["typo", "Ylat", "Xlong"]]
+    expected_ids, _ = brute_force(pois["parking"], lat, lon, 1)
+    assert len(expected_ids) > MAX_RESULTS
+    poi_ids, _, total = table.nearby(typo, "parking", 1, MAX_RESULTS)
+    assert total == len(expected_ids) and poi_ids.tolist() == expected_ids[:MAX_RESULTS].tolist()
+    assert table.nearby(typo, "parking", 1, MAX_RESULTS + 1) is None
+    assert table.nearby(typo, "parking", 1) is None
+
+
+def test_larger_radius_and_unknown_category_are_declined(world):
+    _, streets, table = world
+    typo = streets["typo"].iloc[0]
+    assert table.nearby(typo, "parking", 1.5, 3) is None
+    assert table.nearby(typo, "toilets", 0.5, 3) is None
+
+
+def test_street_without_neighbours_has_none(world):
+    _, _, table = world
+    poi_ids, distances, total = table.nearby("RUE INCONNUE", "museum", 0.5)
+    assert total == 0 and len(poi_ids) == 0 and len(distances) == 0
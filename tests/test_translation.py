@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from common.translation import CachedTranslator, translated_column
+
+
+class FakeBackend:
+    """Backend recording its calls instead of translating remotely."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, dest):
+        self.calls.append((text, dest))
+        return f"{text} [{dest}]"
+
+
+def test_backend_result_is_returned_and_cached(tmp_path):
+    backend = FakeBackend()
+    translator = CachedTranslator(tmp_path / "cache.sqlite", backend=backend)
+    assert translator.translate("Rue de Rivoli") == "Rue de Rivoli [en]"
+    assert translator.translate("Rue de Rivoli") == "Rue de Rivoli [en]"
+    assert translator.translate("Rue de Rivoli", dest="de") == "Rue de Rivoli [de]"
+    assert backend.calls == [("Rue de Rivoli", "en"), ("Rue de Rivoli", "de")]
+
+
+def test_cache_persists_across_translators(tmp_path):
+    CachedTranslator(tmp_path / "cache.sqlite", backend=FakeBackend()).translate("Quai d'Orsay")
+    backend = FakeBackend()
+    translator = CachedTranslator(tmp_path / "cache.sqlite", backend=backend)
+    assert translator.translate("Quai d'Orsay") == "Quai d'Orsay [en]"
+    assert backend.calls == []
+
+
+def test_missing_texts_skip_the_backend():
+    backend = FakeBackend()
+    translator = CachedTranslator(backend=backend)
+    assert translator.translate("   ") == "   "
+    assert translator.translate(None) is None
+    assert pd.isna(translator.translate(float("nan")))
+    assert backend.calls == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    translator = CachedTranslator(tmp_path / "cache.sqlite", backend=FakeBackend(), max_entries=2)
+    for text in ["a", "b", "c"]:
+        translator.translate(text)
+    assert len(translator.cache) == 2
+    assert translator.cache.get("a", "en") is None
+    assert translator.cache.get("c", "en") == "c [en]"
+
+
+def test_backend_errors_propagate(tmp_path):
+    def failing(text, dest):
+        raise ConnectionError("service unavailable")
+
+    translator = CachedTranslator(tmp_path / "cache.sqlite", backend=failing)
+    with pytest.raises(ConnectionError):
+        translator.translate("Rue du Bac")
+    assert len(translator.cache) == 0
+
+
+def test_translated_column_prefers_the_integrated_translation():
+    backend = FakeBackend()
+    translator = CachedTranslator(backend=backend)
+    data = pd.DataFrame({"orig": ["Ancien nom"], "orig_en": ["Former name"]})
+    assert translated_column(data, "orig", translator).tolist() == ["Former name"]
+    assert translated_column(data[["orig"]], "orig", translator).tolist() == ["Ancien nom [en]"]
+    assert backend.calls == [("Ancien nom", "en")]
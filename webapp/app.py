@@ -1,5 +1,18 @@
+from concurrent.futures import as_completed
+import pandas as pd
 import streamlit as st
-from utils import get_street_data, display_museum_data, display_parking_data, display_toilet_data, display_sports_data, display_street_info
+from utils import get_street_data, display_street_info, get_nearby_pois, render_poi_tab, show_map_view, get_snapshot, get_result_caches, get_tab_executor
+
+# Mutations on shared frames are copied instead of leaking to other sessions
+pd.set_option("mode.copy_on_write", True)
+
+# POI tabs: dataset -> (tab title, heading)
+POI_TAB_TITLES = {
+    "parking": ("🚗 Nearby Parking", "Nearby Parking"),
+    "toilets": ("🚻 Nearby Toilets", "Nearby Toilets"),
+    "museums": ("🏛️ Nearby Museums", "Nearby Museums"),
+    "sports": ("🏀 Nearby Sports", "Nearby Sports"),
+}
 
 st.markdown("""
     <style>
@@ -63,52 +76,79 @@ with col2:
     st.markdown("<br>", unsafe_allow_html=True)
     search = st.button("Search")
 
-def display_results(street_name):
+def get_tab_views(street, version, radius=1):
+    """POI tabs already computed for this search in the session: rerunning the page reuses them."""
+    key = (street.typo, radius, version)
+    if st.session_state.get("tab_views_key") != key:
+        st.session_state.tab_views_key = key
+        st.session_state.tab_views = {}
+    return st.session_state.tab_views
+
+def display_results(street_name, radius=1):
     """Fetch and display results for a given street name."""
-    # Fetch street data
-    street_data, suggestion = get_street_data(street_name)
+    # Resolve the street once, every tab reuses it
+    street, suggestion = get_street_data(street_name)
     st.session_state.suggestion = suggestion
 
-    if street_data is not None:
-        st.success(f"✅ Results for *{street_name}*:")  # Display results        
+    if street is not None:
+        st.success(f"✅ Results for *{street.typo}*:")  # Display results        
         # Display results in tabs
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "📜 Street Details",
-            "🚗 Nearby Parking",
-            "🚻 Nearby Toilets",
-            "🏛️ Nearby Museums",
-            "🏀 Nearby Sports"
-        ])
-
-        with tab1:
+        tabs = st.tabs(["📜 Street Details", *[title for title, _ in POI_TAB_TITLES.values()]])
+
+        # Street details are shown first, without waiting for any map
+        with tabs[0]:
             st.markdown("### Street Details")
-            display_street_info(street_data)
-            
-        with tab2:
-            st.markdown("### Nearby Parking")
-            display_parking_data(street_name)
-        with tab3:
-            st.markdown("### Nearby Toilets")
-            display_toilet_data(street_name)
-        with tab4:
-            st.markdown("### Nearby Museums")
-            display_museum_data(street_name)
-        with tab5:
-            st.markdown("### Nearby Sports")
-            display_sports_data(street_name)
-
-
-# Search logic
+            display_street_info(street.data)
+
+        placeholders = {}
+        for tab, (dataset, (_, heading)) in zip(tabs[1:], POI_TAB_TITLES.items()):
+            with tab:
+                st.markdown(f"### {heading}")
+                placeholders[dataset] = st.empty()
+        if not street.coords:
+            for placeholder in placeholders.values():
+                placeholder.warning("Street not found.")
+            return
+
+        # Tabs computed earlier in the session are shown at once. For the others, the nearby POIs of every
+        # category are found once here (one query), then their maps are rendered in parallel
+        # and each one is shown as soon as it is ready
+        snapshot, caches = get_snapshot(), get_result_caches()
+        views = get_tab_views(street, snapshot.version, radius)
+        missing = [dataset for dataset in placeholders if dataset not in views]
+        for dataset in missing:
+            placeholders[dataset].info("⏳ Looking for nearby places...")
+        found = get_nearby_pois(street, radius, snapshot, caches) if missing else {}
+        futures = {}
+        for dataset, placeholder in placeholders.items():
+            if dataset in views:
+                with placeholder.container():
+                    show_map_view(views[dataset])
+            else:
+                nearby, total = found[dataset]
+                futures[get_tab_executor().submit(render_poi_tab, snapshot, caches, street, dataset, nearby, total, radius)] = dataset
+        for future in as_completed(futures):
+            dataset = futures[future]
+            views[dataset] = future.result()
+            with placeholders[dataset].container():
+                show_map_view(views[dataset])
+
+def select_street(street_name):
+    st.session_state.current_input = street_name
+
+
+# Search logic: the current search stays displayed when the page reruns
 if search and user_input.strip():
     st.session_state.current_input = user_input
-    display_results(user_input)
 elif search:
     st.error("❌ Please enter a street name to start the search.")
 
+if st.session_state.current_input:
+    display_results(st.session_state.current_input)
+
 # Handle suggestion
 if st.session_state.suggestion:
-    if st.button(f"💡 Suggestion: Try with '{st.session_state.suggestion}'"):  
-        display_results(st.session_state.suggestion)
+    st.button(f"💡 Suggestion: Try with '{st.session_state.suggestion}'", on_click=select_street, args=(st.session_state.suggestion,))
 
 # Footer
 st.markdown('<div class="footer"><p>Powered by AroundMe - Explore Paris, One Street at a Time</p></div>', unsafe_allow_html=True)
@@ -1,26 +1,23 @@
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import pandas as pd
 import streamlit as st
+import streamlit.components.v1 as components
 import folium
-from streamlit_folium import folium_static
-from googletrans import Translator
-from difflib import get_close_matches
+from folium.plugins import FastMarkerCluster
 
-from math import radians, sin, cos, sqrt, asin
-
-def haversine(lon1, lat1, lon2, lat2):
-    """
-    Calculate the great circle distance in kilometers between two points 
-    on the earth (specified in decimal degrees)
-    """
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-
-    # haversine formula 
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a)) 
-    r = 6371 # Radius of earth in kilometers. 
-    return c * r
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from common.compact import compact_frame
+from common.dataset_store import DatasetStore
+from common.instrumentation import timed
+from common.poi_index import find_nearby_pois, load_poi_index
+from common.proximity import load_proximity_table
+from common.result_cache import ResultCache
+from common.staged_io import read_staged
+from common.street_index import StreetLookup, TrigramIndex
+from common.translation import CachedTranslator, translated_column
 
 # Constants
 DATA_PATHS = {
@@ -28,22 +25,98 @@ DATA_PATHS = {
     "parking": "data/parking_data_staged.csv",
     "toilets": "data/toilets_data_staged.csv",
     "museums": "data/museum_data_staged.csv",
-    "sports": "data/sports_data_staged.csv"
+    "sports": "data/sports_data_staged.csv",
+    "proximity": "data/proximity_data_staged.csv",
+    "pois": "data/poi_data_staged.csv",
+    "street_index": "data/street_index.json",
+    "manifest": "data/integration_manifest.json",
+    "translation_cache": "data/translation_cache.sqlite"
 }
 
-# Load datasets
-data = pd.read_csv(DATA_PATHS["streets"])
-data_parking = pd.read_csv(DATA_PATHS["parking"])
-data_toilets = pd.read_csv(DATA_PATHS["toilets"])
-data_museums = pd.read_csv(DATA_PATHS["museums"])
-data_sports = pd.read_csv(DATA_PATHS["sports"])
+# Columns used by the app, only these are loaded
+DATA_COLUMNS = {
+    "streets": ["typo", "typo_normalized", "historique", "orig", "historique_en", "orig_en", "arrdt", "quartier", "Ylat", "Xlong"],
+    "parking": ["adresse", "gratuit", "tarif_1h", "tarif_2h", "tarif_3h", "tarif_4h", "hauteur_max", "Ylat", "Xlong"],
+    "toilets": ["adresse", "ACCES_PMR", "HORAIRE", "Ylat", "Xlong"],
+    "museums": ["name", "adresse", "Ylat", "Xlong"],
+    "sports": ["name", "adresse", "Ylat", "Xlong"],
+}
 
-# Utility functions
-def translate_text(text, dest="en"):
-    """Translates a given text to the target language."""
-    translator = Translator()
-    return translator.translate(text, dest=dest).text
+# Map rendering: at most MAX_MARKERS markers, drawn as one clustered layer
+MAX_MARKERS = 500
+MAP_RENDER_MODE = "cluster"
+MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2], {maxWidth: 300});
+    marker.bindTooltip(row[3]);
+    return marker;
+}
+"""
+
+# Size of the embedded maps
+MAP_WIDTH = 700
+MAP_HEIGHT = 500
+
+# Map of a POI tab, rendered off the script thread: HTML (None when nothing is nearby), markers drawn and POIs found
+MapView = namedtuple("MapView", ["section", "html", "shown", "total"])
+
+# Worker threads computing the POI tabs of a search in parallel
+TAB_WORKERS = 4
+
+# Shared result caches: nearby results (entries) and rendered maps (bytes of HTML), dropped after RESULT_TTL seconds
+NEARBY_CACHE_SIZE = 2048
+MAP_CACHE_BYTES = 64 * 2**20
+RESULT_TTL = 600
+
+# Proximity table categories of the POI datasets
+POI_CATEGORIES = {"parking": "parking", "toilets": "toilets", "museums": "museum", "sports": "sports"}
+
+
+def load_datasets():
+    """Loads the staged datasets and builds their derived indexes."""
+    # Arrow copies are mapped read-only and shared by the app processes of a node through the OS cache;
+    # tables read from Parquet or CSV are compacted instead (categories, float32 coordinates, shared strings)
+    datasets = {name: compact_frame(read_staged(DATA_PATHS[name], columns, mapped=True)) for name, columns in DATA_COLUMNS.items()}
+    street_index_path = Path(DATA_PATHS["street_index"])
+    # POI tables by category name, to check the integrator's POI and proximity tables against
+    pois = {category: datasets[name] for name, category in POI_CATEGORIES.items()}
+    return datasets, {
+        # Hash index resolving a street name (typo or typo_normalized) to its rows and coordinates
+        "street_lookup": StreetLookup(datasets["streets"]),
+        # Trigram index for street name suggestions, prebuilt by the integrator when available
+        "street_index": TrigramIndex.load(street_index_path) if street_index_path.exists() else TrigramIndex.from_street_data(datasets["streets"]),
+        # Spatial index of every POI, so one search looks at the neighbouring POIs of all categories
+        "poi_index": load_poi_index(DATA_PATHS["pois"], pois),
+        # Precomputed street -> nearby POIs table written by the integrator, if available
+        "proximity_table": load_proximity_table(DATA_PATHS["proximity"], pois),
+    }
+
+
+@st.cache_resource
+def get_dataset_store():
+    """Process-wide store: staged data is loaded once per server and reloaded after each integration run."""
+    return DatasetStore(DATA_PATHS["manifest"], load_datasets)
 
+
+def get_snapshot():
+    """Returns the current version of the staged data and its indexes."""
+    return get_dataset_store().get()
+
+
+@st.cache_resource
+def get_result_caches():
+    """Process-wide caches of nearby results and rendered maps, keyed by (street, dataset, radius) and data version."""
+    return {
+        "nearby": ResultCache("nearby", NEARBY_CACHE_SIZE, RESULT_TTL),
+        "maps": ResultCache("maps", MAP_CACHE_BYTES, RESULT_TTL, getsizeof=len),
+    }
+
+
+# Translations are cached on disk, keyed by (text, target language)
+translator = CachedTranslator(DATA_PATHS["translation_cache"])
+
+# Utility functions
 def format_arrondissement(arr):
     """Formats arrondissement codes to match expected formats."""
     if len(arr) == 1:
@@ -55,60 +128,69 @@ def format_arrondissement(arr):
 
 # Core functions
 def get_street_data(street_name):
-    """Returns information about a street, with suggestions if needed."""
-    search_term = street_name.strip().upper()
-    if search_term not in data["typo"].values:
-        suggestions = get_close_matches(search_term, data["typo"].unique(), n=1, cutoff=0.7)
+    """
+    Resolves a street once per search, with suggestions if needed.
+    Returns the ResolvedStreet (with translated texts), to pass to every tab, and a suggestion.
+    """
+    snapshot = get_snapshot()
+    with timed("street.resolve"):
+        street = snapshot.street_lookup.resolve(street_name)
+    if street is None:
+        with timed("street.suggest"):
+            suggestions = snapshot.street_index.suggest(street_name.strip().upper(), k=1, cutoff=0.7)
         if suggestions:
             return None, suggestions[0]
         else:
             return None, None
-    street_data = data[data["typo"] == search_term]
-    street_data.loc[:, "historique"] = street_data["historique"].apply(translate_text)
-    street_data.loc[:, "orig"] = street_data["orig"].apply(translate_text)
-    return street_data, None
-
-def get_nearby_data_within_radius(data_source, street_coords, radius=1):
-    street_lat, street_lon = street_coords
-    data_source["Ylat"] = pd.to_numeric(data_source["Ylat"], errors="coerce")
-    data_source["Xlong"] = pd.to_numeric(data_source["Xlong"], errors="coerce")
-    data_source = data_source.dropna(subset=["Ylat", "Xlong"])
-    data_source.loc[:, "distance"] = data_source.apply(
-        lambda row: haversine(street_lon, street_lat,  row["Xlong"], row["Ylat"]),
-        axis=1
-    )
-    radius = int(radius)
-    data_source = data_source.copy()
-    data_source["distance"] = data_source["distance"].astype(int)
-    data_source = data_source.dropna(subset=["distance"])
-    return data_source[data_source["distance"] <= radius]
+    street_data = street.data.copy()
+    with timed("street.translate"):
+        street_data["historique"] = translated_column(street_data, "historique", translator)
+        street_data["orig"] = translated_column(street_data, "orig", translator)
+    return street._replace(data=street_data), None
 
+def compute_nearby_pois(snapshot, street, radius=1, limit=MAX_MARKERS):
+    """
+    Returns {dataset: (nearby POIs, total)} for every POI dataset, nearest first, at most `limit` rows each.
+    The precomputed table answers the categories it can; one pass over the POI index answers the others.
+    """
+    with timed("nearby", radius=radius):
+        found = find_nearby_pois(snapshot.poi_index, snapshot.proximity_table, street.typo, street.coords, list(POI_CATEGORIES.values()), radius, limit)
+    results = {}
+    for dataset, category in POI_CATEGORIES.items():
+        poi_ids, distances, total = found[category]
+        nearby = snapshot.dataset(dataset).iloc[poi_ids]
+        nearby["distance"] = distances
+        results[dataset] = (nearby, total)
+    return results
 
-def get_street_coordinates(street_name):
+def get_nearby_pois(street, radius=1, snapshot=None, caches=None):
     """
-    Get the coordinates (latitude, longitude) of a street from the dataset.
+    Returns {dataset: (nearby POIs, total)}, shared between sessions through the result cache.
+    Callers that already hold the session's `snapshot` and `caches` pass them.
     """
-    street_data = data[data["typo"].str.contains(street_name, case=False, na=False)]
-    if street_data.empty:
-        return None
-    return street_data.iloc[0]["Ylat"], street_data.iloc[0]["Xlong"]
+    snapshot = snapshot or get_snapshot()
+    caches = caches or get_result_caches()
+    return caches["nearby"].get_or_compute(
+        (street.typo, radius), snapshot.version, lambda: compute_nearby_pois(snapshot, street, radius)
+    )
+
+def get_nearby_data(street, dataset, radius=1):
+    """Returns the nearby POIs of a dataset (the MAX_MARKERS nearest ones)."""
+    nearby, _ = get_nearby_pois(street, radius)[dataset]
+    return nearby.copy(deep=False)
 
-def display_map(data_source, lat_col, long_col, popup_generator, section, special_point=None, to_show = "adresse"):
+def build_map(data_source, lat_col, long_col, popup_generator, special_point=None, to_show="adresse", render_mode=MAP_RENDER_MODE):
     """
-    Displays a Folium map with markers based on the data source.
-    Optionally centers and highlights a special point.
-    
+    Builds a Folium map with markers based on the data source.
+
     Args:
         data_source (pd.DataFrame): The data source containing marker information.
         lat_col (str): The name of the latitude column in the data source.
         long_col (str): The name of the longitude column in the data source.
         popup_generator (callable): A function to generate popups for markers.
-        section (str): The section name for the map.
         special_point (tuple): Optional. A tuple of (latitude, longitude) for a special point to center on.
+        render_mode (str): "cluster" emits all markers as one clustered layer, "markers" one Marker per row.
     """
-    if data_source.empty:
-        st.info(f"🚫 No nearby {section} found.")
-        return None
     if special_point:
         center = special_point
     else:
@@ -116,26 +198,80 @@ def display_map(data_source, lat_col, long_col, popup_generator, section, specia
 
     m = folium.Map(location=center, zoom_start=15)
 
-    for _, row in data_source.iterrows():
-        popup = folium.Popup(popup_generator(row), max_width=300)
-        folium.Marker(
-            location=[row[lat_col], row[long_col]],
-            popup=popup,
-            tooltip=row[to_show]
-        ).add_to(m)
-    
+    rows = data_source.to_dict("records")
+    if render_mode == "cluster":
+        # One layer only: markers and their popups are created in the browser
+        markers = [[row[lat_col], row[long_col], popup_generator(row), str(row[to_show])] for row in rows]
+        FastMarkerCluster(markers, callback=MARKER_CALLBACK, disableClusteringAtZoom=16).add_to(m)
+    else:
+        for row in rows:
+            popup = folium.Popup(popup_generator(row), max_width=300)
+            folium.Marker(
+                location=[row[lat_col], row[long_col]],
+                popup=popup,
+                tooltip=row[to_show]
+            ).add_to(m)
+
     if special_point:
         folium.Marker(
             location=special_point,
             popup="📍 Your street",
             icon=folium.Icon(color="green", icon="star")
         ).add_to(m)
-    
-    folium_static(m)
+    return m
+
+def render_map(m):
+    """Renders a Folium map to the HTML page embedded in the app."""
+    return folium.Figure().add_child(m).render()
+
+def prepare_map(data_source, lat_col, long_col, popup_generator, section, special_point=None, to_show="adresse", max_markers=MAX_MARKERS, total=None, cached=None):
+    """
+    Renders the map of a data source without drawing anything, so it can run in a worker thread.
+    Only the `max_markers` first rows (the nearest ones) are drawn.
+    `total` is the number of matching rows when the data source was already cut.
+    `cached(render)` returns the rendered HTML from a shared cache when given.
+    """
+    if data_source.empty:
+        return MapView(section, None, 0, 0)
+    total = len(data_source) if total is None else total
+    data_source = data_source.head(max_markers)
+
+    def render():
+        with timed("map.render", section=section, markers=len(data_source)):
+            return render_map(build_map(data_source, lat_col, long_col, popup_generator, special_point, to_show))
+
+    html = render() if cached is None else cached(render)
+    return MapView(section, html, len(data_source), total)
+
+
+def show_map_view(view):
+    """Draws a map prepared by `prepare_map`, with a note when it was cut."""
+    if view.html is None:
+        st.info(f"🚫 No nearby {view.section} found.")
+        return
+    if view.total > view.shown:
+        st.caption(f"Showing the {view.shown} nearest {view.section} out of {view.total}.")
+    components.html(view.html, height=MAP_HEIGHT + 10, width=MAP_WIDTH)
+
+
+def display_map(data_source, lat_col, long_col, popup_generator, section, special_point=None, to_show = "adresse", max_markers=MAX_MARKERS, cache_key=None, total=None):
+    """
+    Displays a Folium map with markers based on the data source.
+    Optionally centers and highlights a special point.
+    With a `cache_key`, the rendered HTML is shared with every session showing the same map.
+    """
+    cached = None
+    if cache_key is not None:
+        maps, version = get_result_caches()["maps"], get_snapshot().version
+        cached = lambda render: maps.get_or_compute((*cache_key, max_markers), version, render)
+    show_map_view(prepare_map(data_source, lat_col, long_col, popup_generator, section, special_point, to_show, max_markers, total, cached))
 
 
 def parking_popup(row):
     """Generates HTML content for parking markers."""
+    # Tables integrated by older versions store the height as text
+    height = pd.to_numeric(row['hauteur_max'], errors="coerce")
+    height = "not specified" if pd.isna(height) else f"{int(height)} cm"
     return f"""
         <b>Address:</b> {row['adresse']}<br>
         <b>Free:</b> {row['gratuit']}<br>
@@ -143,7 +279,7 @@ def parking_popup(row):
         <b>Rate (2h):</b> {row['tarif_2h']} €<br>
         <b>Rate (3h):</b> {row['tarif_3h']} €<br>
         <b>Rate (4h):</b> {row['tarif_4h']} €<br>
-        <b>Max Height:</b> {row['hauteur_max']} cm<br>
+        <b>Max Height:</b> {height}<br>
     """
 
 def toilet_popup(row):
@@ -173,34 +309,25 @@ def display_street_info(street_data):
     st.write(f"- **District:** {street_data['arrdt'].values[0]}")
     st.write(f"- **Neighborhood:** {street_data['quartier'].values[0]}")
 
-def display_parking_data(street_name, radius=1):
-    street_coords = get_street_coordinates(street_name)
-    if not street_coords:
-        st.warning("Street not found.")
-        return
-    parking_data = get_nearby_data_within_radius(data_parking, street_coords, radius)
-    display_map(parking_data, "Ylat", "Xlong", parking_popup, "parking", special_point=street_coords)
-
-def display_toilet_data(street_name, radius=1):
-    street_coords = get_street_coordinates(street_name)
-    if not street_coords:
-        st.warning("Street not found.")
-        return
-    toilet_data = get_nearby_data_within_radius(data_toilets, street_coords, radius)
-    display_map(toilet_data, "Ylat", "Xlong", toilet_popup, "toilets", special_point=street_coords)
+# POI tabs: dataset -> (section name, popup generator, marker tooltip column)
+POI_TABS = {
+    "parking": ("parking", parking_popup, "adresse"),
+    "toilets": ("toilets", toilet_popup, "adresse"),
+    "museums": ("museums", museum_popup, "name"),
+    "sports": ("sports", sports_popup, "name"),
+}
 
-def display_museum_data(street_name, radius=1):
-    street_coords = get_street_coordinates(street_name)
-    if not street_coords:
-        st.warning("Street not found.")
-        return
-    museum_data = get_nearby_data_within_radius(data_museums, street_coords, radius)
-    display_map(museum_data, "Ylat", "Xlong", museum_popup, "museums", special_point=street_coords, to_show="name")
+@st.cache_resource
+def get_tab_executor():
+    """Process-wide worker threads computing the POI tabs of every session."""
+    return ThreadPoolExecutor(max_workers=TAB_WORKERS, thread_name_prefix="poi-tab")
 
-def display_sports_data(street_name, radius=1):
-    street_coords = get_street_coordinates(street_name)
-    if not street_coords:
-        st.warning("Street not found.")
-        return
-    sports_data = get_nearby_data_within_radius(data_sports, street_coords, radius)
-    display_map(sports_data, "Ylat", "Xlong", sports_popup, "sports", special_point=street_coords, to_show= "name")
\ No newline at end of file
+def render_poi_tab(snapshot, caches, street, dataset, nearby, total, radius=1):
+    """
+    Rendered map of a tab's `nearby` POIs (out of `total`), as a MapView.
+    Makes no Streamlit call, so it can run in a worker thread.
+    """
+    section, popup_generator, to_show = POI_TABS[dataset]
+    maps = caches["maps"]
+    cached = lambda render: maps.get_or_compute((street.typo, dataset, radius, MAX_MARKERS), snapshot.version, render)
+    return prepare_map(nearby, "Ylat", "Xlong", popup_generator, section, street.coords, to_show, total=total, cached=cached)